@@ -0,0 +1,8 @@
+"""Meeting Room Booking System
+
+Settings come from the environment. A .env file, when present, is loaded
+here, once, before any module of the app reads its settings.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
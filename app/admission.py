@@ -0,0 +1,276 @@
+"""Per-room admission queue for new bookings
+
+When a popular room opens up, many clients ask for the same slots at once.
+Instead of every request running its own conflict check and insert, new
+confirmed bookings for a room are queued and admitted by a single task per
+room, one micro-batch at a time:
+
+- a request overlapping one queued before it waits until that one is
+  settled, since it may still fail. Once the earlier request is admitted,
+  the later one gets its 409, with the new booking's id, without a
+  database round trip. Clashes with other bookings are always decided by
+  the database, never by this worker's booking index, which may lag
+  behind other workers;
+- each batch holds requests that do not overlap each other and claims its slots with one conditional upsert per day; only
+  requests whose slots were already taken, or that are off the slot grid,
+  are checked against one snapshot of the room's bookings. The admitted
+  requests are inserted with one INSERT ... RETURNING and committed
+  together. If the optional Postgres exclusion constraint rejects that
+  insert, the batch is retried one request at a time, so only the
+  requests that really clash fail.
+
+Serializing per room only covers this worker process. Across processes,
+on-grid bookings are serialized by the slot bitmap claim (`WHERE mask & m
+= 0`), like on every other write path; off-grid ones are checked against
+the bookings table, as when created inline, and only the optional Postgres
+exclusion constraint closes the race between two such checks. Set
+BOOKING_ADMISSION_ENABLED=false to create every booking inline instead.
+
+The drain task runs in a fresh context, so its statements are not counted
+towards the request that happened to start it.
+"""
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.booking_index import normalize_time
+from app.metrics import REGISTRY
+from app.models import Booking, Room
+from app.schemas import BookingCreate
+from app.slots import claim_mask, exact_mask, occupy_slots
+
+logger = logging.getLogger(__name__)
+
+BOOKING_ADMISSION_ENABLED = os.getenv("BOOKING_ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+BOOKING_ADMISSION_MAX_BATCH = int(os.getenv("BOOKING_ADMISSION_MAX_BATCH", "64"))
+
+class BookingConflict(Exception):
+    """The requested slot is taken; ids of the clashing bookings when known"""
+
+    def __init__(self, booking_ids: List[int] = ()):
+        super().__init__("Room is already booked for this time slot")
+        self.booking_ids = list(booking_ids)
+
+class RoomUnavailable(Exception):
+    """The room does not exist or is inactive"""
+
+@dataclass
+class _Pending:
+    user_id: int
+    booking: BookingCreate
+    start: datetime
+    end: datetime
+    future: asyncio.Future = field(repr=False)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        return self.start < end and self.end > start
+
+def _resolve(pending: _Pending, result=None, error: Exception = None):
+    # The waiting request may have been cancelled in the meantime
+    if pending.future.done():
+        return
+    if error is not None:
+        pending.future.set_exception(error)
+    else:
+        pending.future.set_result(result)
+
+class RoomQueue:
+    """Requests waiting for one room, the batch being admitted and what it admitted so far"""
+    __slots__ = ("pending", "in_flight", "admitted")
+
+    def __init__(self):
+        self.pending: List[_Pending] = []
+        self.in_flight: List[_Pending] = []
+        # (start, end, booking id) of the bookings this queue created while it drains
+        self.admitted: List[Tuple[datetime, datetime, int]] = []
+
+    def admitted_clashes(self, start: datetime, end: datetime) -> List[int]:
+        return [booking_id for s, e, booking_id in self.admitted if s < end and e > start]
+
+    def next_batch(self, max_batch: int) -> List[_Pending]:
+        """Take the next requests to admit, first come, first served
+
+        Requests clashing with a booking this queue admitted are refused.
+        A request overlapping an earlier one that is still queued stays
+        queued behind it, so it only ever loses to a booking that was made.
+        """
+        batch: List[_Pending] = []
+        waiting: List[_Pending] = []
+        for pending in self.pending:
+            if pending.future.done():
+                continue
+            clashing = self.admitted_clashes(pending.start, pending.end)
+            if clashing:
+                admission_rejected.inc()
+                _resolve(pending, error=BookingConflict(clashing))
+            elif len(batch) < max_batch and not any(
+                    earlier.overlaps(pending.start, pending.end) for earlier in itertools.chain(batch, waiting)):
+                batch.append(pending)
+            else:
+                waiting.append(pending)
+        self.pending = waiting
+        return batch
+
+class BookingAdmission:
+    """Queues confirmed bookings per room and admits them in micro-batches"""
+
+    def __init__(self, enabled: bool = BOOKING_ADMISSION_ENABLED, max_batch: int = BOOKING_ADMISSION_MAX_BATCH):
+        self.enabled = enabled
+        self.max_batch = max(1, max_batch)
+        self.rooms: Dict[int, RoomQueue] = {}
+
+    async def submit(self, session_factory: Callable, user_id: int, booking: BookingCreate) -> Booking:
+        """Create a confirmed booking, or raise BookingConflict / RoomUnavailable"""
+        room_id = booking.room_id
+        start, end = normalize_time(booking.start_time), normalize_time(booking.end_time)
+        queue = self.rooms.get(room_id)
+        clashing = queue.admitted_clashes(start, end) if queue is not None else None
+        if clashing:
+            admission_rejected.inc()
+            raise BookingConflict(clashing)
+
+        pending = _Pending(user_id, booking, start, end, asyncio.get_running_loop().create_future())
+        if queue is None:
+            queue = self.rooms[room_id] = RoomQueue()
+            queue.pending.append(pending)
+            asyncio.create_task(self._drain(room_id, queue, session_factory), context=contextvars.Context())
+        else:
+            queue.pending.append(pending)
+        return await pending.future
+
+    async def _drain(self, room_id: int, queue: RoomQueue, session_factory: Callable):
+        """Admit queued requests batch by batch until the room's queue is empty"""
+        try:
+            while queue.pending:
+                batch = queue.in_flight = queue.next_batch(self.max_batch)
+                if not batch:
+                    continue
+                try:
+                    async with session_factory() as db:
+                        admitted = await self._admit(db, room_id, batch)
+                    queue.admitted += [(pending.start, pending.end, booking.id) for pending, booking in admitted]
+                except Exception as exc:
+                    logger.exception("Admitting bookings for room %s failed", room_id)
+                    for pending in batch:
+                        _resolve(pending, error=exc)
+                finally:
+                    queue.in_flight = []
+        finally:
+            del self.rooms[room_id]
+
+    async def _admit(self, db, room_id: int, batch: List[_Pending]) -> List[Tuple[_Pending, Booking]]:
+        """Admit a batch of non-overlapping requests; returns the bookings made"""
+        batch = [pending for pending in batch if not pending.future.done()]
+        if not batch:
+            return []
+        admission_batch_size.observe(len(batch))
+
+        result = await db.execute(select(Room.id).where(Room.id == room_id, Room.is_active == True))
+        if result.first() is None:
+            for pending in batch:
+                _resolve(pending, error=RoomUnavailable())
+            return []
+
+        admitted, unsure = await self._claim_slots(db, room_id, batch)
+        if unsure:
+            # Bitmap clashes and off-grid requests: one snapshot of the room's bookings for all of them
+            result = await db.execute(select(Booking.id, Booking.start_time, Booking.end_time).where(
+                Booking.room_id == room_id,
+                Booking.status == "confirmed",
+                Booking.overlaps(min(p.start for p in unsure), max(p.end for p in unsure))
+            ))
+            existing = [(booking_id, normalize_time(start), normalize_time(end))
+                        for booking_id, start, end in result.all()]
+            free = []
+            for pending in unsure:
+                clashing = [booking_id for booking_id, start, end in existing if pending.overlaps(start, end)]
+                if clashing:
+                    _resolve(pending, error=BookingConflict(clashing))
+                else:
+                    free.append(pending)
+            if free:
+                await occupy_slots(db, room_id, [(pending.start, pending.end) for pending in free])
+            admitted += free
+        if not admitted:
+            return []
+
+        try:
+            result = await db.scalars(
+                insert(Booking).returning(Booking, sort_by_parameter_order=True),
+                [dict(pending.booking.model_dump(), user_id=pending.user_id) for pending in admitted]
+            )
+            bookings = result.all()
+            await db.commit()
+        except IntegrityError:
+            # The optional Postgres exclusion constraint caught a booking made elsewhere
+            await db.rollback()
+            if len(admitted) > 1:
+                # It names no row: retry one request at a time so only the clashing ones fail
+                made = []
+                for pending in admitted:
+                    made += await self._admit(db, room_id, [pending])
+                return made
+            pending, = admitted
+            result = await db.execute(select(Booking.id).where(
+                Booking.room_id == room_id,
+                Booking.status == "confirmed",
+                Booking.overlaps(pending.start, pending.end)
+            ))
+            _resolve(pending, error=BookingConflict(result.scalars().all()))
+            return []
+        for pending, booking in zip(admitted, bookings):
+            _resolve(pending, booking)
+        return list(zip(admitted, bookings))
+
+    async def _claim_slots(self, db, room_id: int, batch: List[_Pending]) -> Tuple[List[_Pending], List[_Pending]]:
+        """Claim the batch's slots in the bitmaps, one conditional upsert per day
+
+        Returns the requests whose slots were claimed, and those that still
+        need checking against the bookings table: requests off the slot grid
+        and requests whose bits were already set.
+        """
+        by_day: Dict[date, List[Tuple[_Pending, int]]] = {}
+        unsure = []
+        for pending in batch:
+            exact = exact_mask(pending.start, pending.end)
+            if exact is None:
+                unsure.append(pending)
+            else:
+                by_day.setdefault(exact[0], []).append((pending, exact[1]))
+
+        claimed = []
+        for day, claims in by_day.items():
+            combined = 0
+            for _, mask in claims:
+                combined |= mask
+            if await claim_mask(db, room_id, day, combined):
+                claimed += [pending for pending, _ in claims]
+                continue
+            # Some bit is already set: claim one request at a time to find out which
+            for pending, mask in claims:
+                if await claim_mask(db, room_id, day, mask):
+                    claimed.append(pending)
+                else:
+                    unsure.append(pending)
+        return claimed, unsure
+
+    def queued(self) -> int:
+        return sum(len(queue.pending) + len(queue.in_flight) for queue in self.rooms.values())
+
+booking_admission = BookingAdmission()
+
+# Metrics
+admission_rejected = REGISTRY.counter("booking_admission_rejected_total",
+                                      "Bookings refused with a 409 before reaching the database")
+admission_batch_size = REGISTRY.histogram("booking_admission_batch_size", "Bookings admitted together per room",
+                                          buckets=(1, 2, 4, 8, 16, 32, 64))
+REGISTRY.gauge("booking_admission_queued", "Bookings waiting for or inside an admission batch",
+               function=lambda: booking_admission.queued())
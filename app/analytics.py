@@ -0,0 +1,86 @@
+"""Room utilization from the per room-day slot bitmaps
+
+The room_day_slots table already holds every confirmed booking as booked
+slots, one small row per room and day, so utilization never has to read the
+bookings themselves. Rows are streamed in chunks and each chunk is unpacked
+into a (rows x slots) bit array with NumPy; per room/period totals and the
+weekday x slot heatmap are accumulated with np.add.at. Memory is bounded by
+the size of the result (rooms x periods), not by the number of bookings.
+"""
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from app.models import Room, RoomDaySlots
+from app.slots import SLOT, SLOTS_PER_DAY, DAY_OPENS
+
+CHUNK_ROWS = 50_000
+_SLOT_BITS = np.arange(SLOTS_PER_DAY, dtype=np.int64)
+
+def period_starts(start: date, end: date, granularity: str) -> List[date]:
+    """First day of every period in [start, end]; weeks start on Monday"""
+    if granularity == "day":
+        return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    first_monday = start - timedelta(days=start.weekday())
+    weeks = (end - first_monday).days // 7 + 1
+    return [max(start, first_monday + timedelta(weeks=n)) for n in range(weeks)]
+
+def slot_labels() -> List[str]:
+    return [str(DAY_OPENS + SLOT * i)[:-3].zfill(5) for i in range(SLOTS_PER_DAY)]
+
+async def utilization(db, start: date, end: date, granularity: str = "day",
+                      room_id: Optional[int] = None) -> dict:
+    """Share of bookable slots booked, per room and period, plus a weekday x slot heatmap"""
+    rooms_query = select(Room.id).order_by(Room.id)
+    if room_id is not None:
+        rooms_query = rooms_query.where(Room.id == room_id)
+    room_ids = np.array((await db.execute(rooms_query)).scalars().all(), dtype=np.int64)
+
+    periods = period_starts(start, end, granularity)
+    days = (end - start).days + 1
+    offset = start.weekday() if granularity == "week" else 0
+    period_days = np.bincount((np.arange(days) + offset) // (7 if granularity == "week" else 1),
+                              minlength=len(periods))
+    weekday_days = np.bincount((np.arange(days) + start.weekday()) % 7, minlength=7)
+
+    booked = np.zeros((len(room_ids), len(periods)), dtype=np.int64)
+    heatmap = np.zeros((7, SLOTS_PER_DAY), dtype=np.int64)
+
+    query = select(RoomDaySlots.room_id, RoomDaySlots.day, RoomDaySlots.mask).where(
+        RoomDaySlots.day >= start, RoomDaySlots.day <= end, RoomDaySlots.mask != 0
+    )
+    if room_id is not None:
+        query = query.where(RoomDaySlots.room_id == room_id)
+    result = await db.stream(query.execution_options(yield_per=CHUNK_ROWS))
+    async for chunk in result.partitions():
+        rooms = np.fromiter((row[0] for row in chunk), dtype=np.int64, count=len(chunk))
+        day_offsets = np.fromiter(((row[1] - start).days for row in chunk), dtype=np.int64, count=len(chunk))
+        masks = np.fromiter((row[2] for row in chunk), dtype=np.int64, count=len(chunk))
+
+        positions = np.searchsorted(room_ids, rooms)
+        known = (positions < len(room_ids)) & (room_ids[np.minimum(positions, len(room_ids) - 1)] == rooms)
+        bits = (masks[:, None] >> _SLOT_BITS) & 1
+        periods_of_rows = (day_offsets + offset) // (7 if granularity == "week" else 1)
+        np.add.at(booked, (positions[known], periods_of_rows[known]), bits[known].sum(axis=1))
+        np.add.at(heatmap, (day_offsets + start.weekday()) % 7, bits)
+
+    bookable = period_days * SLOTS_PER_DAY
+    per_room_total = booked.sum(axis=1)
+    room_count = max(len(room_ids), 1)
+    return {
+        "start_date": start,
+        "end_date": end,
+        "granularity": granularity,
+        "slot_minutes": SLOT.seconds // 60,
+        "periods": periods,
+        "overall": round(float(per_room_total.sum()) / (room_count * days * SLOTS_PER_DAY), 4),
+        "rooms": [
+            {"room_id": int(rid), "utilization": round(float(total) / (days * SLOTS_PER_DAY), 4),
+             "periods": np.round(row / bookable, 4).tolist()}
+            for rid, total, row in zip(room_ids, per_room_total, booked)
+        ],
+        "heatmap_slots": slot_labels(),
+        "heatmap": np.round(heatmap / np.maximum(weekday_days[:, None] * room_count, 1), 4).tolist(),
+    }
@@ -0,0 +1,289 @@
+"""In-process index of confirmed bookings for fast availability checks
+
+Confirmed bookings of one room never overlap, so per room they can be kept
+as parallel lists sorted by start time, in which the end times are sorted
+too. The bookings intersecting a window are then one contiguous slice found
+with two binary searches, O(log n) without touching the database.
+
+The index is optional (BOOKING_INDEX_ENABLED) and only advisory: booking
+writes still check conflicts in the database. Anything the index cannot
+vouch for - before the initial build finishes, windows older than the
+indexed history, rooms marked stale or not indexed - is answered from the
+database instead. Each worker process keeps its own copy and only sees its own
+writes, so a periodic consistency check re-syncs rooms changed elsewhere.
+"""
+import asyncio
+import logging
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+
+from app.metrics import REGISTRY
+from app.models import Booking, Room
+
+logger = logging.getLogger(__name__)
+
+BOOKING_INDEX_ENABLED = os.getenv("BOOKING_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+BOOKING_INDEX_HISTORY_DAYS = int(os.getenv("BOOKING_INDEX_HISTORY_DAYS", "1"))
+BOOKING_INDEX_CHECK_SECONDS = int(os.getenv("BOOKING_INDEX_CHECK_SECONDS", "300"))
+
+def normalize_time(value: datetime) -> datetime:
+    """Compare all times as naive UTC, whatever the driver or client sent"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class RoomIntervals:
+    """Sorted, non-overlapping confirmed bookings of a single room"""
+    __slots__ = ("starts", "ends", "ids")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.ids: List[int] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def find(self, start: datetime, end: datetime) -> List[int]:
+        """Ids of bookings with start_time < end and end_time > start"""
+        lo = bisect_right(self.ends, start)
+        hi = bisect_left(self.starts, end, lo)
+        return self.ids[lo:hi]
+
+    def add(self, booking_id: int, start: datetime, end: datetime) -> bool:
+        """Insert a booking; False if it would overlap one already present"""
+        if self.find(start, end):
+            return False
+        position = bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, booking_id)
+        return True
+
+    def remove(self, booking_id: int) -> bool:
+        try:
+            position = self.ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[position], self.ends[position], self.ids[position]
+        return True
+
+    def as_tuples(self):
+        return list(zip(self.ids, self.starts, self.ends))
+
+class BookingIndex:
+    """Per-room interval index plus the set of active rooms"""
+
+    def __init__(self, enabled: bool = BOOKING_INDEX_ENABLED,
+                 history: timedelta = timedelta(days=BOOKING_INDEX_HISTORY_DAYS)):
+        self.enabled = enabled
+        self.history = history
+        self.ready = False
+        self.since: Optional[datetime] = None
+        self.rooms: Dict[int, RoomIntervals] = {}
+        self.active_rooms: Set[int] = set()
+        self.stale_rooms: Set[int] = set()
+        self._building = False
+        self._touched_while_building: Set[int] = set()
+        self._rooms_saved_while_building: Dict[int, bool] = {}
+
+    # Lookups
+
+    def room_exists(self, room_id: int) -> Optional[bool]:
+        """True for a room the index knows to be active, otherwise None for the DB to decide
+
+        Rooms created or reactivated on other workers are missing until the
+        next re-sync, so the index never says a room does not exist.
+        """
+        if self.ready and room_id in self.active_rooms:
+            return True
+        return None
+
+    def lookup(self, room_id: int, start: datetime, end: datetime) -> Optional[List[int]]:
+        """Ids of confirmed bookings overlapping the window, or None to fall back to the DB"""
+        if not self.ready or room_id in self.stale_rooms:
+            index_fallbacks.inc()
+            return None
+        start, end = normalize_time(start), normalize_time(end)
+        if start < self.since:
+            # Bookings that ended before `since` were never loaded
+            index_fallbacks.inc()
+            return None
+        index_hits.inc()
+        intervals = self.rooms.get(room_id)
+        return intervals.find(start, end) if intervals else []
+
+    # Write-path hooks, called after the transaction committed
+
+    def _touch(self, room_id: int):
+        if self._building:
+            self._touched_while_building.add(room_id)
+
+    def booking_saved(self, booking: Booking):
+        """Re-index a booking after it was created, moved, or cancelled"""
+        if not self.enabled:
+            return
+        self._touch(booking.room_id)
+        intervals = self.rooms.get(booking.room_id)
+        if intervals is not None:
+            intervals.remove(booking.id)
+        if booking.status != "confirmed" or not self.ready or booking.room_id in self.stale_rooms:
+            return
+        start, end = normalize_time(booking.start_time), normalize_time(booking.end_time)
+        if end <= self.since:
+            return
+        intervals = self.rooms.setdefault(booking.room_id, RoomIntervals())
+        if not intervals.add(booking.id, start, end):
+            # The DB accepted an overlap we did not expect; stop trusting this room
+            self.mark_stale(booking.room_id)
+
+    def bookings_cancelled(self, room_id: int, booking_ids: List[int]):
+        """Drop bookings cancelled by a bulk UPDATE, without loading them"""
+        if not self.enabled:
+            return
+        self._touch(room_id)
+        intervals = self.rooms.get(room_id)
+        if intervals is not None:
+            for booking_id in booking_ids:
+                intervals.remove(booking_id)
+
+    def room_saved(self, room: Room):
+        if not self.enabled:
+            return
+        if self._building:
+            self._rooms_saved_while_building[room.id] = room.is_active
+        if room.is_active:
+            self.active_rooms.add(room.id)
+        else:
+            self.active_rooms.discard(room.id)
+
+    def mark_stale(self, room_id: int):
+        self.stale_rooms.add(room_id)
+        index_stale_marks.inc()
+
+    # Building and checking
+
+    async def _load_rooms(self, db) -> Set[int]:
+        result = await db.execute(select(Room.id).where(Room.is_active == True))
+        return set(result.scalars().all())
+
+    async def _load_intervals(self, db) -> Dict[int, List[tuple]]:
+        query = select(Booking.room_id, Booking.id, Booking.start_time, Booking.end_time).where(
+            Booking.status == "confirmed", Booking.end_time > self.since
+        )
+        loaded: Dict[int, List[tuple]] = {}
+        result = await db.stream(query.execution_options(yield_per=5000))
+        async for room, booking_id, start, end in result:
+            loaded.setdefault(room, []).append((booking_id, normalize_time(start), normalize_time(end)))
+        return loaded
+
+    def _intervals_from(self, room_id: int, rows: List[tuple]) -> RoomIntervals:
+        intervals = RoomIntervals()
+        for booking_id, start, end in rows:
+            if not intervals.add(booking_id, start, end):
+                self.mark_stale(room_id)
+        return intervals
+
+    def _prune(self):
+        """Drop bookings that ended before the history window"""
+        for intervals in self.rooms.values():
+            cut = bisect_right(intervals.ends, self.since)
+            if cut:
+                del intervals.starts[:cut], intervals.ends[:cut], intervals.ids[:cut]
+
+    def _begin_snapshot(self):
+        self._building = True
+        self._touched_while_building = set()
+        self._rooms_saved_while_building = {}
+
+    def _merge_rooms(self, snapshot: Set[int]) -> Set[int]:
+        """Active rooms from the snapshot, updated with rooms saved while it was read"""
+        for room_id, is_active in self._rooms_saved_while_building.items():
+            if is_active:
+                snapshot.add(room_id)
+            else:
+                snapshot.discard(room_id)
+        return snapshot
+
+    def _end_snapshot(self):
+        # Writes that landed while we were reading may be missing from the snapshot
+        for room_id in self._touched_while_building:
+            self.mark_stale(room_id)
+        self._building = False
+
+    async def build(self, session_factory):
+        """Load active rooms and recent confirmed bookings, then start answering lookups"""
+        if not self.enabled:
+            return
+        self._begin_snapshot()
+        try:
+            self.since = datetime.utcnow() - self.history
+            async with session_factory() as db:
+                active_rooms = await self._load_rooms(db)
+                loaded = await self._load_intervals(db)
+            self.stale_rooms = set()
+            self.rooms = {room_id: self._intervals_from(room_id, rows) for room_id, rows in loaded.items()}
+            self.active_rooms = self._merge_rooms(active_rooms)
+            self.ready = True
+            logger.info("Booking index built: %d rooms, %d bookings",
+                        len(self.rooms), sum(len(i) for i in self.rooms.values()))
+        finally:
+            self._end_snapshot()
+
+    async def check_consistency(self, db) -> List[int]:
+        """Compare every room against the database, re-syncing and returning any that differ"""
+        if not self.ready:
+            return []
+        self._begin_snapshot()
+        try:
+            active_rooms = await self._load_rooms(db)
+            loaded = await self._load_intervals(db)
+        except BaseException:
+            self._building = False
+            raise
+        self.active_rooms = self._merge_rooms(active_rooms)
+        self._prune()
+        mismatched = []
+        for room_id in set(loaded) | set(self.rooms):
+            expected = sorted(loaded.get(room_id, []), key=lambda row: row[1])
+            intervals = self.rooms.get(room_id)
+            actual = intervals.as_tuples() if intervals else []
+            if room_id in self.stale_rooms or actual != expected:
+                mismatched.append(room_id)
+                self.stale_rooms.discard(room_id)
+                self.rooms[room_id] = self._intervals_from(room_id, expected)
+        self._end_snapshot()
+        if mismatched:
+            index_mismatches.inc(len(mismatched))
+            logger.warning("Booking index re-synced rooms %s", mismatched)
+        return mismatched
+
+    async def run_consistency_checks(self, session_factory, interval: float = BOOKING_INDEX_CHECK_SECONDS):
+        """Background loop: build the index, then periodically move the history window and re-sync"""
+        while True:
+            try:
+                if not self.ready:
+                    await self.build(session_factory)
+                else:
+                    self.since = max(self.since, datetime.utcnow() - self.history)
+                    async with session_factory() as db:
+                        await self.check_consistency(db)
+            except Exception:
+                logger.exception("Booking index build or consistency check failed")
+            await asyncio.sleep(interval)
+
+booking_index = BookingIndex()
+
+# Metrics
+index_hits = REGISTRY.counter("booking_index_hits_total", "Availability lookups answered from the booking index")
+index_fallbacks = REGISTRY.counter("booking_index_fallbacks_total",
+                                   "Availability lookups sent to the database because the index was cold or stale")
+index_stale_marks = REGISTRY.counter("booking_index_stale_total", "Rooms marked stale in the booking index")
+index_mismatches = REGISTRY.counter("booking_index_mismatches_total",
+                                    "Rooms found out of sync by the booking index consistency check")
+REGISTRY.gauge("booking_index_ready", "1 when the booking index answers lookups",
+               function=lambda: int(booking_index.ready))
@@ -0,0 +1,79 @@
+"""Small in-process TTL + LRU cache with hit/miss accounting"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.metrics import REGISTRY
+
+_MISSING = object()
+
+cache_hits = REGISTRY.counter("cache_hits_total", "Cache lookups that found a live entry", ("cache",))
+cache_misses = REGISTRY.counter("cache_misses_total", "Cache lookups that found nothing or an expired entry",
+                                ("cache",))
+cache_evictions = REGISTRY.counter("cache_evictions_total", "Entries dropped to stay under the size limit",
+                                   ("cache",))
+
+class TTLCache:
+    """Bounded mapping whose entries expire `ttl` seconds after being set
+
+    Least recently used entries are evicted once `maxsize` is reached.
+    Safe to share between threads.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        REGISTRY.gauge(f"cache_{name}_entries", f"Entries currently held by the {name} cache",
+                       function=lambda: len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hits(self) -> float:
+        return cache_hits.value(cache=self.name)
+
+    @property
+    def misses(self) -> float:
+        return cache_misses.value(cache=self.name)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    cache_hits.inc(cache=self.name)
+                    return value
+                del self._data[key]
+        cache_misses.inc(cache=self.name)
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value; `ttl` overrides the cache default for this entry"""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = 0
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            cache_evictions.inc(evicted, cache=self.name)
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
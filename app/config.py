@@ -8,4 +8,9 @@ MAX_BOOKING_DURATION_HOURS = 4
 MIN_BOOKING_DURATION_HOURS = 0.5  # 30 minutes
 BOOKING_ADVANCE_HOURS = 1  # Must book at least 1 hour in advance
 
-ALLOWED_TIME_INTERVALS = [0, 30]  # Only allow bookings at :00 and :30
\ No newline at end of file
+ALLOWED_TIME_INTERVALS = [0, 30]  # Only allow bookings at :00 and :30
+
+MAX_BATCH_BOOKINGS = 50  # Bookings accepted by a single POST /bookings/batch
+MAX_SERIES_OCCURRENCES = 100  # Occurrences a single recurring series may expand to
+MAX_ANALYTICS_DAYS = 731  # Longest range GET /admin/analytics/utilization accepts
+MAX_BULK_ROOMS = 1000  # Rows accepted by a single POST /rooms/bulk
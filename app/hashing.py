@@ -0,0 +1,118 @@
+"""Bounded executor for password hashing
+
+bcrypt burns 100-300 ms of CPU per call. Running it inline in an async
+handler stalls every other request on the worker, so hashing is handed to
+a small thread pool (bcrypt releases the GIL while it works). The number of
+calls allowed to wait for a thread is capped; beyond that callers are
+turned away straight away instead of queueing without limit.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from app.metrics import REGISTRY
+
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+
+class HashingPoolFull(Exception):
+    """Raised when the hashing queue is at its limit"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password hashing queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class HashingPool:
+    """Runs blocking hash calls on a fixed-size thread pool with admission control"""
+
+    def __init__(self, workers: int, queue_limit: int, name: str = "hashing"):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self.name = name
+        self.pending = 0  # running + waiting calls
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_limit
+
+    @property
+    def average_seconds(self) -> float:
+        return self.total_seconds / self.completed if self.completed else 0.2
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so forked workers never inherit a parent's threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix=self.name
+                    )
+        return self._executor
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        return max(1, math.ceil(self.average_seconds * self.pending / self.workers))
+
+    def _timed(self, func: Callable, args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.completed += 1
+                self.total_seconds += elapsed
+            hash_completed.inc()
+            hash_seconds.inc(elapsed)
+            hash_duration.observe(elapsed, operation=func.__name__)
+
+    async def run(self, func: Callable, *args):
+        """Run `func(*args)` on the pool, or raise HashingPoolFull if the queue is full"""
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                rejected = True
+            else:
+                self.pending += 1
+                rejected = False
+        if rejected:
+            hash_rejected.inc()
+            raise HashingPoolFull(self.retry_after())
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), self._timed, func, args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+hashing_pool = HashingPool(HASH_POOL_SIZE, HASH_QUEUE_LIMIT)
+
+# Metrics
+REGISTRY.gauge("password_hash_pool_size", "Threads available for password hashing",
+               function=lambda: hashing_pool.workers)
+REGISTRY.gauge("password_hash_queue_limit", "Hash calls allowed to wait for a thread",
+               function=lambda: hashing_pool.queue_limit)
+REGISTRY.gauge("password_hash_pending", "Hash calls running or waiting for a thread",
+               function=lambda: hashing_pool.pending)
+hash_rejected = REGISTRY.counter("password_hash_rejected_total",
+                                 "Hash calls refused because the queue was full")
+hash_completed = REGISTRY.counter("password_hash_completed_total", "Hash calls completed")
+hash_seconds = REGISTRY.counter("password_hash_seconds_total",
+                                "Time spent hashing or verifying passwords")
+hash_duration = REGISTRY.histogram("password_hash_duration_seconds", "Time per bcrypt hash or verify call",
+                                   ("operation",), buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0))
@@ -0,0 +1,92 @@
+"""Server-side cache of serialized responses with strong ETags
+
+Entries hold the exact JSON body sent to clients, so a hit costs neither a
+query nor a Pydantic pass, and a request whose If-None-Match names the
+cached ETag is answered 304 straight from memory. Writers call
+`invalidate()` after commit; it bumps the cache version and drops every
+entry. A response computed from data read before the bump is not stored.
+
+ETags are a digest of the body, so every worker process hands out the same
+tag for the same content. Each worker only sees its own writes, so entries
+also expire after ROOM_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+
+from app.cache import TTLCache
+
+ROOM_CACHE_SIZE = int(os.getenv("ROOM_CACHE_SIZE", "256"))
+ROOM_CACHE_TTL_SECONDS = float(os.getenv("ROOM_CACHE_TTL_SECONDS", "30"))
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+def http_date(value: datetime) -> str:
+    """Format a timestamp for Last-Modified; naive values are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+class ResponseCache:
+    """Cache of ready-to-send JSON bodies, keyed by path and the endpoint's parameters"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.entries = TTLCache(name, maxsize=maxsize, ttl=ttl)
+        self.version = 0
+
+    @staticmethod
+    def key(request: Request, **params) -> str:
+        """Path plus the validated parameters the endpoint reads, sorted by name
+
+        Not the raw query string: reordered, repeated or unknown parameters
+        and spellings like limit=010 would each get an entry of their own.
+        """
+        used = sorted((name, str(value)) for name, value in params.items() if value is not None)
+        return f"{request.url.path}?{urlencode(used)}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return self.entries.get(key)
+
+    def store(self, key: str, version: int, body: bytes,
+              last_modified: Optional[datetime] = None, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """Build an entry and keep it unless the data changed since `version` was read"""
+        headers = dict(headers or {})
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified)
+        entry = CachedResponse(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', headers=headers)
+        if version == self.version:
+            self.entries.set(key, entry)
+        return entry
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        headers = dict(entry.headers, ETag=entry.etag)
+        headers["Cache-Control"] = "no-cache"  # always revalidate; a 304 is cheap
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            headers.pop("Last-Modified", None)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def invalidate(self):
+        self.version += 1
+        self.entries.clear()
+
+room_cache = ResponseCache("room_responses", ROOM_CACHE_SIZE, ROOM_CACHE_TTL_SECONDS)
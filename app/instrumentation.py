@@ -0,0 +1,125 @@
+"""Request and database instrumentation feeding /metrics
+
+`RequestMetricsMiddleware` times every HTTP request and labels it with the
+route template (`/api/v1/rooms/{room_id}`, never the raw path, so the
+number of series stays bounded). While a request runs, a context variable
+holds a small per-request tally; the engine's cursor events add each SQL
+statement and its time to it, so queries and DB time are reported per
+route as well as in total. Statements issued outside a request (background
+jobs) only count towards the totals.
+
+Everything here is a few dict lookups and a lock per observation. Set
+METRICS_ENABLED=false to leave the middleware and engine events out
+entirely; `python -m benchmarks.metrics_overhead` compares the two.
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.metrics import REGISTRY
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+class RequestStats:
+    """SQL statements and time spent in the database by one request"""
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    db_queries.inc()
+    db_query_seconds.inc(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for a failed statement
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+def instrument_engine(engine):
+    """Count and time every statement run through `engine` and expose its pool"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+    # Gauges read the pool when scraped; pools without a fixed size report 0
+    def pool_value(method: str, minimum: int = 0):
+        function = getattr(sync_engine.pool, method, None)
+        return max(function(), minimum) if function else 0
+
+    REGISTRY.gauge("db_pool_size", "Connections the pool keeps open",
+                   function=lambda: pool_value("size"))
+    REGISTRY.gauge("db_pool_checked_out", "Pool connections currently in use",
+                   function=lambda: pool_value("checkedout"))
+    REGISTRY.gauge("db_pool_overflow", "Connections open beyond the pool size",
+                   function=lambda: pool_value("overflow"))
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    # Unmatched paths (404s, scanners) share one label instead of one each
+    return getattr(route, "path", "unmatched")
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware recording count, latency and DB work per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route, method = _route_template(scope), scope["method"]
+            http_requests.inc(method=method, route=route, status=status_code)
+            http_request_seconds.observe(elapsed, method=method, route=route)
+            http_request_db_queries.observe(stats.queries, route=route)
+            http_request_db_seconds.observe(stats.db_seconds, route=route)
+
+# Metrics
+http_requests = REGISTRY.counter("http_requests_total", "HTTP requests handled",
+                                 ("method", "route", "status"))
+http_request_seconds = REGISTRY.histogram("http_request_duration_seconds",
+                                          "Time from receiving a request to sending the last byte",
+                                          ("method", "route"))
+http_request_db_queries = REGISTRY.histogram("http_request_db_queries", "SQL statements run per request",
+                                             ("route",), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100))
+http_request_db_seconds = REGISTRY.histogram("http_request_db_seconds", "Time spent in the database per request",
+                                             ("route",),
+                                             buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+db_queries = REGISTRY.counter("db_queries_total", "SQL statements executed")
+db_query_seconds = REGISTRY.counter("db_query_seconds_total", "Time spent executing SQL statements")
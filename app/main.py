@@ -1,25 +1,48 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from app.database import get_db, engine, Base
-from app.models import User, Room, Booking
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, SessionLocal, read_router, replicas
+from app.models import User
 from app.schemas import *
-from app.auth import verify_token, create_access_token, get_current_user, get_password_hash, verify_password
+from app.auth import AuthenticatedUser, create_access_token, token_claims, get_current_user, get_password_hash_async, verify_password_async
+from app.hashing import hashing_pool
+from app.booking_index import booking_index
+from app.stats import stats_counters
+from app.metrics import REGISTRY, CONTENT_TYPE
+from app.instrumentation import METRICS_ENABLED, RequestMetricsMiddleware
+from app.replicas import ReadYourWritesMiddleware
+from app.pagination import NEXT_CURSOR_HEADER
 from app.routers import rooms, bookings, admin
-from datetime import datetime, timedelta
-import os
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
 
-load_dotenv()
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Engines are created here, not at import; the schema is managed by `alembic upgrade head`
+    await SessionLocal.connect()
+    # Warm the booking index in the background; lookups use the DB until it is ready
+    background = []
+    if booking_index.enabled:
+        background.append(asyncio.create_task(booking_index.run_consistency_checks(SessionLocal)))
+    # Admin stats counters: counted once now, then reconciled periodically
+    if stats_counters.enabled:
+        background.append(asyncio.create_task(stats_counters.run_reconciliation(SessionLocal)))
+    yield
+    for task in background:
+        task.cancel()
+    hashing_pool.shutdown()
+    await SessionLocal.dispose()
+    for replica in replicas:
+        await replica.dispose()
 
 # Create FastAPI instance
 app = FastAPI(
     title="Meeting Room Booking System",
     description="A full-stack meeting room booking system with user authentication and admin controls",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -29,8 +52,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Clients that just wrote keep reading from the primary
+if read_router.enabled:
+    app.add_middleware(ReadYourWritesMiddleware, router=read_router)
+
+# Per-route request metrics; added last so it also times the other middleware
+if METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # Include routers
 app.include_router(rooms.router, prefix="/api/v1", tags=["rooms"])
 app.include_router(bookings.router, prefix="/api/v1", tags=["bookings"])
@@ -40,11 +72,12 @@ app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 @app.post("/auth/register")
 async def register_user(
     user_data: UserRegister,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user with hashed password"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -52,7 +85,7 @@ async def register_user(
         )
     
     # Create new user with hashed password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password,  # Now properly hashed!
@@ -61,8 +94,9 @@ async def register_user(
         is_verified=False
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    stats_counters.adjust(total_users=1)
     
     return {
         "message": "User registered successfully", 
@@ -74,18 +108,19 @@ async def register_user(
 @app.post("/auth/login")
 async def login(
     user_credentials: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login user with password verification"""
-    user = db.query(User).filter(User.email == user_credentials.email).first()
-    if not user or not verify_password(user_credentials.password, user.hashed_password):  # Proper password verification!
+    result = await db.execute(select(User).where(User.email == user_credentials.email))
+    user = result.scalars().first()
+    if not user or not await verify_password_async(user_credentials.password, user.hashed_password):  # Proper password verification!
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data=token_claims(user))
     return {
         "access_token": access_token, 
         "token_type": "bearer",
@@ -94,14 +129,19 @@ async def login(
     }
 
 @app.get("/users/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     """Get current user information"""
+    # Identity and role come from the token; only the profile date needs the database
+    result = await db.execute(select(User.created_at).where(User.id == current_user.id))
     return {
         "id": current_user.id,
         "email": current_user.email,
         "is_admin": current_user.is_superuser,
         "is_active": current_user.is_active,
-        "created_at": current_user.created_at
+        "created_at": result.scalar()
     }
 
 # Root endpoint
@@ -118,7 +158,12 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "Meeting Room Booking System"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
 # Test protected endpoint
 @app.get("/protected")
-async def protected_route(current_user: User = Depends(get_current_user)):
+async def protected_route(current_user: AuthenticatedUser = Depends(get_current_user)):
     return {"message": f"Hello {current_user.email}, this is a protected route!"}
\ No newline at end of file
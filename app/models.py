@@ -1,10 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Text, Index, and_, text
+from sqlalchemy.orm import relationship, selectinload, noload
 from sqlalchemy.sql import func
 from app.database import Base
-from fastapi_users.db import SQLAlchemyBaseUserTable
 
-class User(SQLAlchemyBaseUserTable[int], Base):
+class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -13,6 +12,8 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
+    # Bumped to revoke every access token issued to the user so far
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -34,6 +35,31 @@ class Room(Base):
     # Relationships
     bookings = relationship("Booking", back_populates="room")
 
+class RoomDaySlots(Base):
+    """Booked half-hour slots of one room on one day, see app.slots"""
+    __tablename__ = "room_day_slots"
+
+    room_id = Column(Integer, ForeignKey("rooms.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    mask = Column(Integer, default=0, nullable=False)  # bit i = i-th slot after opening
+
+class BookingSeries(Base):
+    """Recurrence rule of a set of bookings; each occurrence is a Booking row"""
+    __tablename__ = "booking_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
+    frequency = Column(String(10), nullable=False)  # daily, weekly
+    interval = Column(Integer, default=1, nullable=False)  # every N days/weeks
+    start_time = Column(DateTime(timezone=True), nullable=False)  # first occurrence
+    end_time = Column(DateTime(timezone=True), nullable=False)
+    until = Column(Date)     # last day an occurrence may start on, or
+    count = Column(Integer)  # number of occurrences
+    status = Column(String(20), default="confirmed", nullable=False)  # confirmed, cancelled
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
 class Booking(Base):
     __tablename__ = "bookings"
     
@@ -43,9 +69,44 @@ class Booking(Base):
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True), nullable=False)
     status = Column(String(20), default="confirmed", nullable=False)  # confirmed, cancelled
+    series_id = Column(Integer, ForeignKey("booking_series.id"), nullable=True)  # set on recurring occurrences
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Relationships
-    user = relationship("User", back_populates="bookings")
-    room = relationship("Room", back_populates="bookings") 
\ No newline at end of file
+    # Relationships (eager, so BookingRead can serialize them without async lazy loads)
+    user = relationship("User", back_populates="bookings", lazy="selectin")
+    room = relationship("Room", back_populates="bookings", lazy="selectin")
+
+    __table_args__ = (
+        # Conflict checks only ever look at confirmed bookings of one room in a time window
+        Index(
+            "ix_bookings_room_time_confirmed", "room_id", "start_time", "end_time",
+            postgresql_where=text("status = 'confirmed'"),
+            sqlite_where=text("status = 'confirmed'"),
+        ),
+        # Keyset pagination of "my bookings" and the admin booking list
+        Index("ix_bookings_user_start", "user_id", "start_time", "id"),
+        Index("ix_bookings_start", "start_time", "id"),
+        # Series-wide updates and cancellation
+        Index("ix_bookings_series", "series_id"),
+    )
+
+    @classmethod
+    def related_loader(cls, include_related: bool = True):
+        """Loader options for user/room: one batched SELECT each, or skip them entirely"""
+        if include_related:
+            return (selectinload(cls.user), selectinload(cls.room))
+        return (noload(cls.user), noload(cls.room))
+
+    @classmethod
+    def overlaps(cls, start_time, end_time, max_duration=None):
+        """Filter for bookings whose [start_time, end_time) intersects the given window
+
+        With `max_duration` (a timedelta no booking exceeds) the start time is
+        bounded on both sides, so the index on (room_id, start_time, ...) is
+        read as a short range instead of every earlier booking of the room.
+        """
+        condition = and_(cls.start_time < end_time, cls.end_time > start_time)
+        if max_duration is not None:
+            condition = and_(condition, cls.start_time > start_time - max_duration)
+        return condition 
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Keyset (cursor) pagination for list endpoints
+
+Pages are requested with an opaque `cursor` that encodes the sort key of
+the last row already returned, so every page is an index range scan
+instead of an OFFSET that re-reads all earlier rows. The cursor for the
+next page is returned in the X-Next-Cursor response header; it is absent
+on the last page. Response bodies stay plain JSON lists.
+"""
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import literal, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+CursorQuery = Query(None, description=f"Opaque cursor from a previous page's {NEXT_CURSOR_HEADER} header")
+LimitQuery = Query(DEFAULT_PAGE_SIZE, ge=1, description=f"Page size, capped at {MAX_PAGE_SIZE}")
+SkipQuery = Query(0, ge=0, deprecated=True, description="Offset paging; use cursor instead")
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (binascii.Error, ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return values
+
+def page_size(limit: int) -> int:
+    """Clamp a requested page size to the server maximum"""
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def after_cursor(query, order_by: Sequence, cursor: Optional[str]):
+    """Order by the key columns and, given a cursor, start strictly after it"""
+    if cursor:
+        values = decode_cursor(cursor, len(order_by))
+        bound = [literal(value, column.type) for column, value in zip(order_by, values)]
+        if len(order_by) == 1:
+            query = query.where(order_by[0] > bound[0])
+        else:
+            query = query.where(tuple_(*order_by) > tuple_(*bound))
+    return query.order_by(*order_by)
+
+async def paginate(db, query, order_by: Sequence, cursor: Optional[str], limit: int,
+                   response: Response, skip: int = 0, as_rows: bool = False) -> list:
+    """Fetch one page of ORM rows and set the next-page cursor header
+
+    With `as_rows` the page holds result rows instead, for queries that
+    select columns; the order_by columns must be among them.
+    """
+    limit = page_size(limit)
+    query = after_cursor(query, order_by, cursor)
+    if skip:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit + 1))
+    rows = list(result.all() if as_rows else result.scalars().all())
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, column.key) for column in order_by])
+    return rows
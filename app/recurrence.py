@@ -0,0 +1,28 @@
+"""Expansion of recurring booking rules into concrete occurrences"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+FREQUENCY_STEPS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
+def expand_occurrences(start_time: datetime, end_time: datetime, frequency: str, interval: int = 1,
+                       count: Optional[int] = None, until: Optional[date] = None,
+                       limit: Optional[int] = None) -> List[Tuple[datetime, datetime]]:
+    """(start, end) of every occurrence, the first one being (start_time, end_time)
+
+    Stops after `count` occurrences or after the last one starting on or
+    before the `until` day, whichever comes first, and never returns more
+    than `limit`.
+    """
+    step = FREQUENCY_STEPS[frequency] * interval
+    duration = end_time - start_time
+    occurrences = []
+    start = start_time
+    while (count is None or len(occurrences) < count) and (until is None or start.date() <= until):
+        if limit is not None and len(occurrences) >= limit:
+            break
+        occurrences.append((start, start + duration))
+        start += step
+    return occurrences
@@ -0,0 +1,103 @@
+"""Routing of read-only requests to read replicas
+
+With READ_REPLICA_URLS set, routes that only read take their session from
+`get_read_db`, which hands out replica sessions in turn. Replicas lag the
+primary, so a client that has just written reads from the primary for
+READ_AFTER_WRITE_SECONDS afterwards and sees its own changes.
+
+`ReadYourWritesMiddleware` recognises writers after every successful
+POST/PUT/PATCH/DELETE. It remembers a digest of the Authorization header,
+which covers API clients within this worker process, and sets a short-lived
+cookie, which browsers send back to every worker.
+"""
+import hashlib
+import itertools
+import time
+from typing import Callable, List, Optional
+
+from app.cache import TTLCache
+from app.metrics import REGISTRY
+
+STICKY_COOKIE = "read_primary_until"
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+def _writer_key(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+class ReadRouter:
+    """Chooses the primary or a replica session factory for each read"""
+
+    def __init__(self, primary: Callable, replicas: List[Callable], window: float, maxsize: int = 10000):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.window = window
+        self.recent_writers = TTLCache("recent_writers", maxsize=maxsize, ttl=window)
+        self._next_replica = itertools.cycle(self.replicas) if self.replicas else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def wrote(self, authorization: Optional[str]):
+        key = _writer_key(authorization)
+        if key is not None:
+            self.recent_writers.set(key, True)
+
+    def is_sticky(self, authorization: Optional[str], cookie: Optional[str]) -> bool:
+        """Whether this client wrote within the read-after-write window
+
+        The cookie is client input: a value that does not parse, or lies
+        further ahead than any cookie we set (the window, rounded up to a
+        whole second), is ignored rather than pinning reads to the primary.
+        """
+        if cookie:
+            try:
+                until = float(cookie)
+            except ValueError:
+                until = 0.0
+            now = time.time()
+            if now < until <= now + max(int(self.window), 1) + 1:
+                return True
+        key = _writer_key(authorization)
+        return key is not None and self.recent_writers.get(key, False)
+
+    def session_factory(self, authorization: Optional[str] = None, cookie: Optional[str] = None) -> Callable:
+        if not self.enabled:
+            return self.primary
+        if self.is_sticky(authorization, cookie):
+            read_sessions.inc(target="primary")
+            return self.primary
+        read_sessions.inc(target="replica")
+        return next(self._next_replica)
+
+class ReadYourWritesMiddleware:
+    """Marks clients whose write requests succeeded as readers of the primary"""
+
+    def __init__(self, app, router: ReadRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = dict(scope["headers"])
+                authorization = headers.get(b"authorization")
+                self.router.wrote(authorization.decode("latin-1") if authorization else None)
+                window = int(self.router.window) or 1
+                cookie = (f"{STICKY_COOKIE}={time.time() + window:.0f}; Max-Age={window}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1"))])
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+# Metrics
+read_sessions = REGISTRY.counter("db_read_sessions_total",
+                                 "Sessions handed to read-only routes, by primary or replica", ("target",))
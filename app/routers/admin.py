@@ -1,47 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db, get_session_factory
 from app.models import Booking, Room, User
-from app.schemas import BookingRead, RoomRead, UserRead, MessageResponse
-from app.auth import get_current_admin
+from app.schemas import BookingRead, RoomRead, UserRead, MessageResponse, Granularity, UtilizationReport, ExportFormat
+from app.auth import AuthenticatedUser, get_current_admin, invalidate_cached_user, revoke_tokens
+from app.booking_index import booking_index
+from app.slots import release_slots
+from app.stats import count_stats, stats_counters
+from app.config import MAX_ANALYTICS_DAYS
+from app.routers.bookings import IncludeRelated, booking_list_query
+from app.serialization import BookingList, RoomList, UserList, list_response, response_columns
+from app.pagination import CursorQuery, LimitQuery, SkipQuery, paginate
 from typing import List
-from datetime import datetime, date
+import csv
+import io
+import json
+from datetime import datetime, date, timezone
 
 router = APIRouter()
 
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_COLUMNS = (
+    Booking.id, Booking.user_id, Booking.room_id, Booking.start_time, Booking.end_time,
+    Booking.status, Booking.series_id, Booking.created_at, Booking.updated_at
+)
+
+def _filter_bookings(query, room_id: int = None, start_date: date = None, end_date: date = None):
+    """Room and start-date filters shared by the booking list and export"""
+    if room_id:
+        query = query.where(Booking.room_id == room_id)
+    
+    if start_date:
+        query = query.where(Booking.start_time >= datetime.combine(start_date, datetime.min.time()))
+    
+    if end_date:
+        query = query.where(Booking.start_time <= datetime.combine(end_date, datetime.max.time()))
+    return query
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _encode_ndjson(keys, rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(keys, map(_export_value, row))), separators=(",", ":")) + "\n" for row in rows
+    )
+
+def _encode_csv(keys, rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        ["" if v is None else _export_value(v) for v in row] for row in rows
+    )
+    return buffer.getvalue()
+
+@router.get("/bookings/export")
+async def export_bookings(
+    format: ExportFormat = ExportFormat.NDJSON,
+    room_id: int = None,
+    start_date: date = None,
+    end_date: date = None,
+    session_factory = Depends(get_session_factory),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
+):
+    """Stream every matching booking as NDJSON or CSV, ordered by start time (Admin only)
+
+    Plain column rows are read from a server-side cursor in chunks and
+    written out as they arrive, so memory use does not grow with the
+    result. The session is opened inside the stream because dependency
+    sessions are closed before a streamed body is sent.
+    """
+    query = _filter_bookings(select(*EXPORT_COLUMNS), room_id, start_date, end_date)
+    query = query.order_by(Booking.start_time, Booking.id).execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    keys = [column.key for column in EXPORT_COLUMNS]
+    encode = _encode_csv if format == ExportFormat.CSV else _encode_ndjson
+
+    async def body():
+        if format == ExportFormat.CSV:
+            yield ",".join(keys) + "\n"
+        async with session_factory() as db:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield encode(keys, rows)
+
+    media_type = "text/csv" if format == ExportFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="bookings.{format.value}"'
+    })
+
 @router.get("/bookings", response_model=List[BookingRead])
 async def get_all_bookings(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str = CursorQuery,
+    limit: int = LimitQuery,
+    skip: int = SkipQuery,
     room_id: int = None,
     start_date: date = None,
     end_date: date = None,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    include_related: bool = IncludeRelated,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
-    """Get all bookings with optional filters (Admin only)"""
-    query = db.query(Booking)
-    
-    if room_id:
-        query = query.filter(Booking.room_id == room_id)
-    
-    if start_date:
-        query = query.filter(Booking.start_time >= datetime.combine(start_date, datetime.min.time()))
-    
-    if end_date:
-        query = query.filter(Booking.start_time <= datetime.combine(end_date, datetime.max.time()))
-    
-    bookings = query.offset(skip).limit(limit).all()
-    return bookings
+    """Get all bookings with optional filters, ordered by start time (Admin only)"""
+    query = _filter_bookings(booking_list_query(include_related), room_id, start_date, end_date)
+    bookings = await paginate(db, query, (Booking.start_time, Booking.id), cursor, limit, response, skip,
+                              as_rows=True)
+    return list_response(BookingList, bookings, response)
 
 @router.get("/bookings/{booking_id}", response_model=BookingRead)
 async def get_booking_admin(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Get any booking by ID (Admin only)"""
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    result = await db.execute(select(Booking).where(Booking.id == booking_id))
+    booking = result.scalars().first()
     if not booking:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,77 +126,109 @@ async def get_booking_admin(
 @router.delete("/bookings/{booking_id}", response_model=MessageResponse)
 async def cancel_booking_admin(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Cancel any booking (Admin only)"""
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    result = await db.execute(select(Booking).where(Booking.id == booking_id))
+    booking = result.scalars().first()
     if not booking:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Booking not found"
         )
     
-    booking.status = "cancelled"
-    db.commit()
+    was_confirmed = booking.status == "confirmed"
+    if was_confirmed:
+        booking.status = "cancelled"
+        await release_slots(db, booking.room_id, [(booking.start_time, booking.end_time)])
+    await db.commit()
+    booking_index.booking_saved(booking)
+    if was_confirmed:
+        stats_counters.adjust(active_bookings=-1)
     return MessageResponse(message=f"Booking {booking_id} cancelled successfully")
 
 @router.get("/rooms", response_model=List[RoomRead])
 async def get_all_rooms_admin(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: str = CursorQuery,
+    limit: int = LimitQuery,
+    skip: int = SkipQuery,
     include_inactive: bool = False,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Get all rooms including inactive ones (Admin only)"""
-    query = db.query(Room)
+    query = select(*response_columns(Room, RoomRead))
     
     if not include_inactive:
-        query = query.filter(Room.is_active == True)
+        query = query.where(Room.is_active == True)
     
-    rooms = query.offset(skip).limit(limit).all()
-    return rooms
+    rooms = await paginate(db, query, (Room.id,), cursor, limit, response, skip, as_rows=True)
+    return list_response(RoomList, rooms, response)
 
 @router.get("/users", response_model=List[UserRead])
 async def get_all_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    response: Response,
+    cursor: str = CursorQuery,
+    limit: int = LimitQuery,
+    skip: int = SkipQuery,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Get all users (Admin only)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    query = select(*response_columns(User, UserRead))
+    users = await paginate(db, query, (User.id,), cursor, limit, response, skip, as_rows=True)
+    return list_response(UserList, users, response)
 
 @router.get("/stats")
 async def get_system_stats(
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
-    """Get system statistics (Admin only)"""
-    total_rooms = db.query(Room).count()
-    active_rooms = db.query(Room).filter(Room.is_active == True).count()
-    total_bookings = db.query(Booking).count()
-    active_bookings = db.query(Booking).filter(Booking.status == "confirmed").count()
-    total_users = db.query(User).count()
-    
-    return {
-        "total_rooms": total_rooms,
-        "active_rooms": active_rooms,
-        "total_bookings": total_bookings,
-        "active_bookings": active_bookings,
-        "total_users": total_users
-    }
+    """Get system statistics (Admin only)
+
+    Served from the in-process counters when they are enabled and have
+    been counted, otherwise counted now in one query. `counted_at` and
+    `age_seconds` tell how long ago the database was last counted.
+    """
+    if stats_counters.ready:
+        stats = dict(stats_counters.values)
+        stats.update(source="counters", counted_at=stats_counters.counted_at,
+                     age_seconds=stats_counters.age_seconds())
+        return stats
+    stats = await count_stats(db)
+    stats.update(source="database", counted_at=datetime.now(timezone.utc), age_seconds=0.0)
+    return stats
+
+@router.get("/analytics/utilization", response_model=UtilizationReport)
+async def get_utilization(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    granularity: Granularity = Granularity.DAY,
+    room_id: int = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
+):
+    """Room occupancy per day or week and a weekday x slot heatmap (Admin only)"""
+    if to_date < from_date or (to_date - from_date).days >= MAX_ANALYTICS_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must run forwards and span at most {MAX_ANALYTICS_DAYS} days"
+        )
+    # Imported here: numpy is only needed by this report, not to start a worker
+    from app.analytics import utilization
+    return await utilization(db, from_date, to_date, granularity.value, room_id)
 
 @router.post("/make-admin/{user_id}")
 async def make_user_admin(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Make a user an admin (Admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,5 +236,34 @@ async def make_user_admin(
         )
     
     user.is_superuser = True
-    db.commit()
-    return MessageResponse(message=f"User {user.email} is now an admin") 
\ No newline at end of file
+    revoke_tokens(user)  # tokens carry the role; the user logs in again to get an admin token
+    await db.commit()
+    invalidate_cached_user(user.id)
+    return MessageResponse(message=f"User {user.email} is now an admin")
+
+@router.post("/deactivate/{user_id}", response_model=MessageResponse)
+async def deactivate_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
+):
+    """Deactivate a user so their tokens stop working (Admin only)"""
+    if user_id == current_admin.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot deactivate your own account"
+        )
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    user.is_active = False
+    revoke_tokens(user)
+    await db.commit()
+    invalidate_cached_user(user.id)
+    return MessageResponse(message=f"User {user.email} has been deactivated") 
\ No newline at end of file
@@ -1,35 +1,108 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.database import get_db
-from app.models import Booking, Room, User
-from app.schemas import BookingCreate, BookingRead, BookingUpdate, BookingConflictResponse, MessageResponse
-from app.auth import get_current_user
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db, get_session_factory
+from app.models import Booking, BookingSeries, Room, RoomDaySlots, User
+from app.schemas import (
+    BookingCreate, BookingRead, BookingUpdate, BookingConflictResponse, MessageResponse,
+    BatchMode, BatchItemStatus, BookingBatchCreate, BookingBatchItemResult, BookingBatchResult,
+    BookingSeriesCreate, BookingSeriesRead, RoomDayAvailability, SlotRead, RoomRead, UserRead
+)
+from app.config import MAX_SERIES_OCCURRENCES
+from app.recurrence import expand_occurrences
+from app.slots import SLOT_MINUTES, claim_slots, occupy_slots, release_slots, reserve_slots, slot_times
+from app.stats import stats_counters
+from app.auth import AuthenticatedUser, get_current_user
+from app.booking_index import booking_index, normalize_time
+from app.admission import BookingConflict, RoomUnavailable, booking_admission
+from app.pagination import CursorQuery, LimitQuery, paginate
+from app.serialization import BookingList, list_response, related_columns, response_columns
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
 
 router = APIRouter()
 
+# Shared by the list endpoints: lean payloads skip the nested user/room objects
+IncludeRelated = Query(True, description="Embed each booking's user and room; false returns them as null")
+
+def booking_list_query(include_related: bool = True):
+    """Columns of BookingRead, joined to its user and room when they are embedded"""
+    columns = response_columns(Booking, BookingRead)
+    if not include_related:
+        return select(*columns)
+    return (
+        select(*columns, *related_columns(User, UserRead, "user"), *related_columns(Room, RoomRead, "room"))
+        .join(User, User.id == Booking.user_id)
+        .join(Room, Room.id == Booking.room_id)
+    )
+
+async def _commit_or_conflict(db: AsyncSession):
+    """Commit, turning a violated no-overlap constraint into a 409"""
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Raised by the optional Postgres exclusion constraint when a
+        # concurrent request booked the slot between our check and insert
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Room is already booked for this time slot"
+        )
+
+async def _claim_or_conflict(db: AsyncSession, room_id: int, intervals, detail: str):
+    """Claim the slots of bookings checked against the bookings table, or roll back with a 409"""
+    if not await claim_slots(db, room_id, intervals):
+        # A concurrent request took some of the slots since the range query
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+def _check_duration(start_time: datetime, end_time: datetime):
+    """Duration rules for updates, where only one of the times may have been sent"""
+    duration = (end_time - start_time).total_seconds() / 3600
+    if duration <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End time must be after start time"
+        )
+    if duration > 4:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booking cannot exceed 4 hours"
+        )
+    if duration < 0.5:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Minimum booking duration is 30 minutes"
+        )
+
 @router.get("/bookings", response_model=List[BookingRead])
 async def get_my_bookings(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    cursor: str = CursorQuery,
+    limit: int = LimitQuery,
+    include_related: bool = IncludeRelated,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Get current user's bookings"""
-    bookings = db.query(Booking).filter(Booking.user_id == current_user.id).all()
-    return bookings
+    """Get current user's bookings, ordered by start time"""
+    query = booking_list_query(include_related).where(Booking.user_id == current_user.id)
+    bookings = await paginate(db, query, (Booking.start_time, Booking.id), cursor, limit, response, as_rows=True)
+    return list_response(BookingList, bookings, response)
 
 @router.get("/bookings/{booking_id}", response_model=BookingRead)
 async def get_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Get a specific booking by ID"""
-    booking = db.query(Booking).filter(
+    result = await db.execute(select(Booking).where(
         Booking.id == booking_id,
         Booking.user_id == current_user.id
-    ).first()
+    ))
+    booking = result.scalars().first()
     
     if not booking:
         raise HTTPException(
@@ -41,46 +114,62 @@ async def get_booking(
 @router.post("/bookings", response_model=BookingRead)
 async def create_booking(
     booking: BookingCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    session_factory = Depends(get_session_factory),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    """Create a new booking"""
+    """Create a new booking
+
+    Confirmed bookings go through the per-room admission queue, which checks
+    concurrent requests for the same room together.
+    """
+    if booking_admission.enabled and booking.status == "confirmed":
+        try:
+            db_booking = await booking_admission.submit(session_factory, current_user.id, booking)
+        except RoomUnavailable:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Room not found or inactive"
+            )
+        except BookingConflict as exc:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Room is already booked for this time slot",
+                headers={"X-Conflicting-Bookings": str(exc.booking_ids)} if exc.booking_ids else None
+            )
+        booking_index.booking_saved(db_booking)
+        stats_counters.adjust(total_bookings=1, active_bookings=1)
+        return db_booking
+
     # Check if room exists and is active
-    room = db.query(Room).filter(Room.id == booking.room_id, Room.is_active == True).first()
+    result = await db.execute(select(Room).where(Room.id == booking.room_id, Room.is_active == True))
+    room = result.scalars().first()
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Room not found or inactive"
         )
     
-    # Check for booking conflicts
-    conflicting_bookings = db.query(Booking).filter(
-        and_(
+    # Claim the slots in the room's day bitmap; only a clash, or a booking
+    # off the slot grid, needs the range query against the bookings table
+    confirmed = booking.status == "confirmed"
+    claimed = await reserve_slots(db, booking.room_id, booking.start_time, booking.end_time) if confirmed else None
+    if not claimed:
+        result = await db.execute(select(Booking).where(
             Booking.room_id == booking.room_id,
             Booking.status == "confirmed",
-            or_(
-                and_(
-                    Booking.start_time <= booking.start_time,
-                    Booking.end_time > booking.start_time
-                ),
-                and_(
-                    Booking.start_time < booking.end_time,
-                    Booking.end_time >= booking.end_time
-                ),
-                and_(
-                    Booking.start_time >= booking.start_time,
-                    Booking.end_time <= booking.end_time
-                )
+            Booking.overlaps(booking.start_time, booking.end_time)
+        ))
+        conflicting_bookings = result.scalars().all()
+        
+        if conflicting_bookings:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Room is already booked for this time slot",
+                headers={"X-Conflicting-Bookings": str([b.id for b in conflicting_bookings])}
             )
-        )
-    ).all()
-    
-    if conflicting_bookings:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Room is already booked for this time slot",
-            headers={"X-Conflicting-Bookings": str([b.id for b in conflicting_bookings])}
-        )
+        if confirmed:
+            await occupy_slots(db, booking.room_id, [(booking.start_time, booking.end_time)])
     
     # Create booking
     db_booking = Booking(
@@ -88,22 +177,133 @@ async def create_booking(
         **booking.dict()
     )
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
+    await _commit_or_conflict(db)
+    await db.refresh(db_booking)
+    booking_index.booking_saved(db_booking)
+    stats_counters.adjust(total_bookings=1, active_bookings=int(confirmed))
     return db_booking
 
+async def _existing_bookings_by_room(db: AsyncSession, items: List[BookingCreate]) -> Dict[int, List[tuple]]:
+    """Confirmed bookings that could clash with the batch, one query per room
+
+    Each room is queried once over the span from its earliest requested
+    start to its latest requested end.
+    """
+    windows: Dict[int, tuple] = {}
+    for item in items:
+        start, end = normalize_time(item.start_time), normalize_time(item.end_time)
+        low, high = windows.get(item.room_id, (start, end))
+        windows[item.room_id] = (min(low, start), max(high, end))
+
+    existing: Dict[int, List[tuple]] = {}
+    for room_id, (low, high) in windows.items():
+        result = await db.execute(select(Booking.id, Booking.start_time, Booking.end_time).where(
+            Booking.room_id == room_id,
+            Booking.status == "confirmed",
+            Booking.overlaps(low, high)
+        ))
+        existing[room_id] = [
+            (booking_id, normalize_time(start), normalize_time(end)) for booking_id, start, end in result.all()
+        ]
+    return existing
+
+@router.post(
+    "/bookings/batch",
+    response_model=BookingBatchResult,
+    responses={status.HTTP_409_CONFLICT: {"model": BookingBatchResult}}
+)
+async def create_bookings_batch(
+    batch: BookingBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Create several bookings in one transaction
+
+    Items are checked against the database and against each other. In
+    atomic mode any failed item rejects the whole batch with a 409; in
+    best_effort mode the items that fit are created and the rest reported.
+    """
+    items = batch.items
+    room_ids = {item.room_id for item in items}
+    result = await db.execute(select(Room.id).where(Room.id.in_(room_ids), Room.is_active == True))
+    active_rooms = set(result.scalars().all())
+    existing = await _existing_bookings_by_room(
+        db, [item for item in items if item.room_id in active_rooms]
+    )
+
+    results: List[BookingBatchItemResult] = []
+    accepted: Dict[int, List[tuple]] = {}  # room_id -> (index, start, end) of items that fit
+    for index, item in enumerate(items):
+        if item.room_id not in active_rooms:
+            results.append(BookingBatchItemResult(
+                index=index, status=BatchItemStatus.ROOM_NOT_FOUND, detail="Room not found or inactive"
+            ))
+            continue
+        start, end = normalize_time(item.start_time), normalize_time(item.end_time)
+        clashing_bookings = [b for b, b_start, b_end in existing[item.room_id] if b_start < end and b_end > start]
+        clashing_items = [i for i, i_start, i_end in accepted.get(item.room_id, []) if i_start < end and i_end > start]
+        if clashing_bookings or clashing_items:
+            results.append(BookingBatchItemResult(
+                index=index,
+                status=BatchItemStatus.CONFLICT,
+                detail="Room is already booked for this time slot",
+                conflicting_booking_ids=clashing_bookings,
+                conflicting_items=clashing_items
+            ))
+            continue
+        accepted.setdefault(item.room_id, []).append((index, start, end))
+        results.append(BookingBatchItemResult(index=index, status=BatchItemStatus.CREATED))
+
+    failed = sum(1 for r in results if r.status != BatchItemStatus.CREATED)
+    if failed and batch.mode == BatchMode.ATOMIC:
+        for r in results:
+            if r.status == BatchItemStatus.CREATED:
+                r.status = BatchItemStatus.NOT_CREATED
+        body = BookingBatchResult(mode=batch.mode, created=0, failed=failed, results=results)
+        return JSONResponse(status_code=status.HTTP_409_CONFLICT, content=body.model_dump(mode="json"))
+
+    created = {
+        r.index: Booking(user_id=current_user.id, **items[r.index].model_dump())
+        for r in results if r.status == BatchItemStatus.CREATED
+    }
+    if created:
+        db.add_all(created.values())
+        for room_id, intervals in accepted.items():
+            await _claim_or_conflict(db, room_id, [
+                (start, end) for index, start, end in intervals if created[index].status == "confirmed"
+            ], "Room is already booked for this time slot")
+        await _commit_or_conflict(db)
+        # One reload for the whole batch, with user and room attached
+        result = await db.execute(
+            select(Booking)
+            .where(Booking.id.in_([b.id for b in created.values()]))
+            .options(*Booking.related_loader())
+            .execution_options(populate_existing=True)
+        )
+        result.scalars().all()
+        for r in results:
+            if r.index in created:
+                booking = created[r.index]
+                booking_index.booking_saved(booking)
+                r.booking = BookingRead.model_validate(booking, from_attributes=True)
+        stats_counters.adjust(total_bookings=len(created),
+                              active_bookings=sum(b.status == "confirmed" for b in created.values()))
+
+    return BookingBatchResult(mode=batch.mode, created=len(created), failed=failed, results=results)
+
 @router.put("/bookings/{booking_id}", response_model=BookingRead)
 async def update_booking(
     booking_id: int,
     booking_update: BookingUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Update a booking (only own bookings)"""
-    booking = db.query(Booking).filter(
+    result = await db.execute(select(Booking).where(
         Booking.id == booking_id,
         Booking.user_id == current_user.id
-    ).first()
+    ))
+    booking = result.scalars().first()
     
     if not booking:
         raise HTTPException(
@@ -117,44 +317,15 @@ async def update_booking(
         new_end = booking_update.end_time or booking.end_time
         
         # Additional validation for update duration when only one time is changed
-        duration = (new_end - new_start).total_seconds() / 3600
-        if duration <= 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="End time must be after start time"
-            )
-        if duration > 4:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Booking cannot exceed 4 hours"
-            )
-        if duration < 0.5:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Minimum booking duration is 30 minutes"
-            )
+        _check_duration(new_start, new_end)
         
-        conflicting_bookings = db.query(Booking).filter(
-            and_(
-                Booking.room_id == booking.room_id,
-                Booking.id != booking_id,
-                Booking.status == "confirmed",
-                or_(
-                    and_(
-                        Booking.start_time <= new_start,
-                        Booking.end_time > new_start
-                    ),
-                    and_(
-                        Booking.start_time < new_end,
-                        Booking.end_time >= new_end
-                    ),
-                    and_(
-                        Booking.start_time >= new_start,
-                        Booking.end_time <= new_end
-                    )
-                )
-            )
-        ).all()
+        result = await db.execute(select(Booking).where(
+            Booking.room_id == booking.room_id,
+            Booking.id != booking_id,
+            Booking.status == "confirmed",
+            Booking.overlaps(new_start, new_end)
+        ))
+        conflicting_bookings = result.scalars().all()
         
         if conflicting_bookings:
             raise HTTPException(
@@ -163,25 +334,34 @@ async def update_booking(
             )
     
     # Update booking
+    previous = (booking.status, booking.start_time, booking.end_time)
     update_data = booking_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(booking, field, value)
     
-    db.commit()
-    db.refresh(booking)
+    if previous[0] == "confirmed":
+        await release_slots(db, booking.room_id, [previous[1:]])
+    if booking.status == "confirmed":
+        await _claim_or_conflict(db, booking.room_id, [(booking.start_time, booking.end_time)],
+                                 "Room is already booked for this time slot")
+    await _commit_or_conflict(db)
+    await db.refresh(booking)
+    booking_index.booking_saved(booking)
+    stats_counters.adjust(active_bookings=int(booking.status == "confirmed") - int(previous[0] == "confirmed"))
     return booking
 
 @router.delete("/bookings/{booking_id}", response_model=MessageResponse)
 async def cancel_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Cancel a booking (only own bookings)"""
-    booking = db.query(Booking).filter(
+    result = await db.execute(select(Booking).where(
         Booking.id == booking_id,
         Booking.user_id == current_user.id
-    ).first()
+    ))
+    booking = result.scalars().first()
     
     if not booking:
         raise HTTPException(
@@ -189,49 +369,290 @@ async def cancel_booking(
             detail="Booking not found"
         )
     
-    booking.status = "cancelled"
-    db.commit()
+    was_confirmed = booking.status == "confirmed"
+    if was_confirmed:
+        booking.status = "cancelled"
+        await release_slots(db, booking.room_id, [(booking.start_time, booking.end_time)])
+    await db.commit()
+    booking_index.booking_saved(booking)
+    if was_confirmed:
+        stats_counters.adjust(active_bookings=-1)
     return MessageResponse(message="Booking cancelled successfully")
 
+# Recurring series. Single occurrences are ordinary bookings and are changed
+# or cancelled through the /bookings/{booking_id} endpoints above.
+
+async def _series_conflicts(db: AsyncSession, room_id: int, occurrences: List[Tuple[datetime, datetime]],
+                            exclude_series: Optional[int] = None) -> List[int]:
+    """Ids of confirmed bookings clashing with any occurrence, from one range query"""
+    low = min(start for start, _ in occurrences)
+    high = max(end for _, end in occurrences)
+    query = select(Booking.id, Booking.start_time, Booking.end_time).where(
+        Booking.room_id == room_id,
+        Booking.status == "confirmed",
+        Booking.overlaps(low, high)
+    )
+    if exclude_series is not None:
+        query = query.where(or_(Booking.series_id.is_(None), Booking.series_id != exclude_series))
+    result = await db.execute(query)
+    windows = [(normalize_time(start), normalize_time(end)) for start, end in occurrences]
+    conflicting = []
+    for booking_id, b_start, b_end in result.all():
+        b_start, b_end = normalize_time(b_start), normalize_time(b_end)
+        if any(start < b_end and end > b_start for start, end in windows):
+            conflicting.append(booking_id)
+    return conflicting
+
+async def _get_own_series(db: AsyncSession, series_id: int, user_id: int) -> BookingSeries:
+    result = await db.execute(select(BookingSeries).where(
+        BookingSeries.id == series_id,
+        BookingSeries.user_id == user_id
+    ))
+    series = result.scalars().first()
+    if not series:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Booking series not found"
+        )
+    return series
+
+async def _load_occurrences(db: AsyncSession, series: BookingSeries) -> List[Booking]:
+    """All occurrences of a series with user and room, refreshed from the database"""
+    result = await db.execute(
+        select(Booking)
+        .where(Booking.series_id == series.id)
+        .order_by(Booking.start_time)
+        .options(*Booking.related_loader())
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
+
+def _series_read(series: BookingSeries, bookings: List[Booking]) -> BookingSeriesRead:
+    data = BookingSeriesRead.model_validate(series, from_attributes=True)
+    data.bookings = [BookingRead.model_validate(b, from_attributes=True) for b in bookings]
+    return data
+
+async def _cancel_series(db: AsyncSession, series: BookingSeries):
+    """Cancel every confirmed occurrence with a single UPDATE"""
+    result = await db.execute(
+        update(Booking)
+        .where(Booking.series_id == series.id, Booking.status == "confirmed")
+        .values(status="cancelled")
+        .returning(Booking.id, Booking.start_time, Booking.end_time)
+    )
+    cancelled = result.all()
+    await release_slots(db, series.room_id, [(start, end) for _, start, end in cancelled])
+    series.status = "cancelled"
+    await db.commit()
+    await db.refresh(series)
+    booking_index.bookings_cancelled(series.room_id, [booking_id for booking_id, _, _ in cancelled])
+    stats_counters.adjust(active_bookings=-len(cancelled))
+
+@router.post("/bookings/series", response_model=BookingSeriesRead)
+async def create_booking_series(
+    series_in: BookingSeriesCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Create a recurring booking; every occurrence must be free"""
+    result = await db.execute(select(Room).where(Room.id == series_in.room_id, Room.is_active == True))
+    if not result.scalars().first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found or inactive"
+        )
+
+    occurrences = expand_occurrences(
+        series_in.start_time, series_in.end_time, series_in.frequency.value, series_in.interval,
+        count=series_in.count, until=series_in.until, limit=MAX_SERIES_OCCURRENCES + 1
+    )
+    if len(occurrences) > MAX_SERIES_OCCURRENCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A series cannot have more than {MAX_SERIES_OCCURRENCES} occurrences"
+        )
+
+    conflicting = await _series_conflicts(db, series_in.room_id, occurrences)
+    if conflicting:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Room is already booked for some occurrences of this series",
+            headers={"X-Conflicting-Bookings": str(conflicting)}
+        )
+
+    series = BookingSeries(user_id=current_user.id, **series_in.model_dump(exclude={"status"}))
+    db.add(series)
+    await db.flush()
+    bookings = [
+        Booking(user_id=current_user.id, room_id=series.room_id, series_id=series.id,
+                start_time=start, end_time=end)
+        for start, end in occurrences
+    ]
+    db.add_all(bookings)
+    await _claim_or_conflict(db, series.room_id, occurrences,
+                             "Room is already booked for some occurrences of this series")
+    await _commit_or_conflict(db)
+    for booking in bookings:
+        booking_index.booking_saved(booking)
+    stats_counters.adjust(total_bookings=len(bookings), active_bookings=len(bookings))
+    return _series_read(series, await _load_occurrences(db, series))
+
+@router.get("/bookings/series/{series_id}", response_model=BookingSeriesRead)
+async def get_booking_series(
+    series_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Get a recurring booking and all of its occurrences"""
+    series = await _get_own_series(db, series_id, current_user.id)
+    return _series_read(series, await _load_occurrences(db, series))
+
+@router.put("/bookings/series/{series_id}", response_model=BookingSeriesRead)
+async def update_booking_series(
+    series_id: int,
+    series_update: BookingUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Move or re-time every confirmed occurrence of a series
+
+    start_time and end_time are the new times of the series' first
+    occurrence; every occurrence shifts by the same offset and takes the
+    new duration.
+    """
+    series = await _get_own_series(db, series_id, current_user.id)
+    if series_update.status == "cancelled":
+        await _cancel_series(db, series)
+        return _series_read(series, await _load_occurrences(db, series))
+    if not (series_update.start_time or series_update.end_time):
+        return _series_read(series, await _load_occurrences(db, series))
+
+    # Client times may be aware or naive, and so may the driver's; compare as naive UTC
+    old_start, old_end = normalize_time(series.start_time), normalize_time(series.end_time)
+    new_start = normalize_time(series_update.start_time) if series_update.start_time else old_start
+    if series_update.end_time:
+        new_end = normalize_time(series_update.end_time)
+    else:
+        new_end = new_start + (old_end - old_start)  # a new start alone keeps the duration
+    _check_duration(new_start, new_end)
+    offset = new_start - old_start
+    duration = new_end - new_start
+
+    result = await db.execute(select(Booking.id, Booking.start_time, Booking.end_time).where(
+        Booking.series_id == series.id,
+        Booking.status == "confirmed"
+    ))
+    current = result.all()
+    moves = [
+        {"id": booking_id, "start_time": normalize_time(start) + offset,
+         "end_time": normalize_time(start) + offset + duration}
+        for booking_id, start, _ in current
+    ]
+    if moves:
+        conflicting = await _series_conflicts(
+            db, series.room_id, [(m["start_time"], m["end_time"]) for m in moves], exclude_series=series.id
+        )
+        if conflicting:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Room is already booked for some occurrences of this series",
+                headers={"X-Conflicting-Bookings": str(conflicting)}
+            )
+        # ORM bulk UPDATE by primary key: one executemany for all occurrences
+        await db.execute(update(Booking), moves)
+        await release_slots(db, series.room_id, [(start, end) for _, start, end in current])
+        await _claim_or_conflict(db, series.room_id, [(m["start_time"], m["end_time"]) for m in moves],
+                                 "Room is already booked for some occurrences of this series")
+
+    series.start_time, series.end_time = new_start, new_end
+    await _commit_or_conflict(db)
+    await db.refresh(series)
+    bookings = await _load_occurrences(db, series)
+    for booking in bookings:
+        booking_index.booking_saved(booking)
+    return _series_read(series, bookings)
+
+@router.delete("/bookings/series/{series_id}", response_model=MessageResponse)
+async def cancel_booking_series(
+    series_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """Cancel every confirmed occurrence of a series"""
+    series = await _get_own_series(db, series_id, current_user.id)
+    await _cancel_series(db, series)
+    return MessageResponse(message="Booking series cancelled successfully")
+
 @router.get("/rooms/{room_id}/availability")
 async def check_room_availability(
     room_id: int,
     start_time: datetime,
     end_time: datetime,
-    db: Session = Depends(get_db)
+    include_related: bool = IncludeRelated,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Check if a room is available for a specific time slot"""
+    # The in-process index answers without the database when it is warm
+    room_known = booking_index.room_exists(room_id)
+    conflicting_ids = booking_index.lookup(room_id, start_time, end_time) if room_known else None
+
     # Check if room exists
-    room = db.query(Room).filter(Room.id == room_id, Room.is_active == True).first()
-    if not room:
+    if room_known is None:
+        result = await db.execute(select(Room).where(Room.id == room_id, Room.is_active == True))
+        room_known = result.scalars().first() is not None
+    if not room_known:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Room not found"
         )
     
     # Check for conflicts
-    conflicting_bookings = db.query(Booking).filter(
-        and_(
+    if conflicting_ids is None:
+        result = await db.execute(select(Booking).where(
             Booking.room_id == room_id,
             Booking.status == "confirmed",
-            or_(
-                and_(
-                    Booking.start_time <= start_time,
-                    Booking.end_time > start_time
-                ),
-                and_(
-                    Booking.start_time < end_time,
-                    Booking.end_time >= end_time
-                ),
-                and_(
-                    Booking.start_time >= start_time,
-                    Booking.end_time <= end_time
-                )
-            )
+            Booking.overlaps(start_time, end_time)
+        ).options(*Booking.related_loader(include_related)))
+        conflicting_bookings = result.scalars().all()
+    elif conflicting_ids:
+        result = await db.execute(
+            select(Booking)
+            .where(Booking.id.in_(conflicting_ids))
+            .options(*Booking.related_loader(include_related))
         )
-    ).all()
+        conflicting_bookings = result.scalars().all()
+    else:
+        conflicting_bookings = []
     
     return {
         "available": len(conflicting_bookings) == 0,
-        "conflicting_bookings": [BookingRead.from_orm(b) for b in conflicting_bookings]
-    } 
\ No newline at end of file
+        "conflicting_bookings": [BookingRead.model_validate(b, from_attributes=True) for b in conflicting_bookings]
+    }
+
+@router.get("/rooms/{room_id}/availability/day", response_model=RoomDayAvailability)
+async def get_room_day_grid(
+    room_id: int,
+    date: date,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Booked and free slots of a room for one business day, from its slot bitmap"""
+    result = await db.execute(
+        select(Room.id, RoomDaySlots.mask)
+        .outerjoin(RoomDaySlots, (RoomDaySlots.room_id == Room.id) & (RoomDaySlots.day == date))
+        .where(Room.id == room_id, Room.is_active == True)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
+        )
+    mask = row.mask or 0
+    return RoomDayAvailability(
+        room_id=room_id,
+        date=date,
+        slot_minutes=SLOT_MINUTES,
+        booked_mask=mask,
+        slots=[SlotRead(start_time=start, end_time=end, available=not booked)
+               for start, end, booked in slot_times(date, mask)]
+    )
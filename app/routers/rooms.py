@@ -1,46 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Room, User
-from app.schemas import RoomCreate, RoomRead, RoomUpdate, MessageResponse
-from app.auth import verify_token, get_current_user, get_current_admin
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import MAX_BOOKING_DURATION_HOURS, MAX_BULK_ROOMS
+from app.database import get_db, get_read_db, upsert_insert
+from app.models import Booking, Room
+from app.schemas import (
+    RoomCreate, RoomRead, RoomUpdate, MessageResponse, BulkRoomResult, BulkRoomRowResult, BulkRoomStatus
+)
+from app.auth import AuthenticatedUser, get_current_admin
+from app.booking_index import booking_index
+from app.http_cache import room_cache
+from app.stats import stats_counters
+from app.pagination import NEXT_CURSOR_HEADER, CursorQuery, LimitQuery, SkipQuery, page_size, paginate
+from app.serialization import RoomList, dump_list, list_response, response_columns
+from typing import List, Optional
+from datetime import datetime, timedelta
+import csv
+import io
+import json
 
 router = APIRouter()
 
+def _last_modified(rooms) -> Optional[datetime]:
+    stamps = [room.updated_at or room.created_at for room in rooms]
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
 @router.get("/rooms", response_model=List[RoomRead])
 async def get_rooms(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: str = CursorQuery,
+    limit: int = LimitQuery,
+    skip: int = SkipQuery,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get all active rooms - public endpoint
+
+    Served from the room response cache when possible; If-None-Match with
+    the current ETag gets a 304.
+    """
+    key = room_cache.key(request, cursor=cursor, limit=page_size(limit), skip=skip)
+    entry = room_cache.get(key)
+    if entry is None:
+        version = room_cache.version
+        query = select(*response_columns(Room, RoomRead)).where(Room.is_active == True)
+        rooms = await paginate(db, query, (Room.id,), cursor, limit, response, skip, as_rows=True)
+        headers = {}
+        if NEXT_CURSOR_HEADER in response.headers:
+            headers[NEXT_CURSOR_HEADER] = response.headers[NEXT_CURSOR_HEADER]
+        entry = room_cache.store(key, version, dump_list(RoomList, rooms), _last_modified(rooms), headers)
+    return room_cache.respond(request, entry)
+
+def _has_amenity(amenity: str):
+    """Whole-item match against the comma separated amenities text, ignoring case and spaces"""
+    listed = "," + func.lower(func.replace(func.coalesce(Room.amenities, ""), " ", "")) + ","
+    return listed.contains("," + amenity.strip().lower().replace(" ", "") + ",", autoescape=True)
+
+@router.get("/rooms/search", response_model=List[RoomRead])
+async def search_free_rooms(
+    response: Response,
+    start: datetime,
+    end: datetime,
+    min_capacity: int = Query(1, ge=1),
+    amenities: Optional[str] = Query(None, description="Comma separated, all required"),
+    cursor: str = CursorQuery,
+    limit: int = LimitQuery,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all active rooms - public endpoint"""
-    rooms = db.query(Room).filter(Room.is_active == True).offset(skip).limit(limit).all()
-    return rooms
+    """Active rooms with enough capacity and no confirmed booking in the window - public endpoint
+
+    One query: an anti-join (NOT EXISTS) against the confirmed bookings
+    overlapping the window. Smallest suitable rooms come first.
+    """
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End time must be after start time"
+        )
+    booked = exists().where(
+        Booking.room_id == Room.id,
+        Booking.status == "confirmed",
+        Booking.overlaps(start, end, max_duration=timedelta(hours=MAX_BOOKING_DURATION_HOURS))
+    )
+    query = select(*response_columns(Room, RoomRead)).where(
+        Room.is_active == True, Room.capacity >= min_capacity, ~booked
+    )
+    for amenity in (amenities or "").split(","):
+        if amenity.strip():
+            query = query.where(_has_amenity(amenity))
+    rooms = await paginate(db, query, (Room.capacity, Room.id), cursor, limit, response, as_rows=True)
+    return list_response(RoomList, rooms, response)
 
 @router.get("/rooms/{room_id}", response_model=RoomRead)
 async def get_room(
     room_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get a specific room by ID - public endpoint"""
-    room = db.query(Room).filter(Room.id == room_id, Room.is_active == True).first()
-    if not room:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Room not found"
-        )
-    return room
+    """Get a specific room by ID - public endpoint, cached like the room list"""
+    key = room_cache.key(request)
+    entry = room_cache.get(key)
+    if entry is None:
+        version = room_cache.version
+        result = await db.execute(select(Room).where(Room.id == room_id, Room.is_active == True))
+        room = result.scalars().first()
+        if not room:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Room not found"
+            )
+        body = RoomRead.model_validate(room, from_attributes=True).model_dump_json().encode()
+        entry = room_cache.store(key, version, body, _last_modified([room]))
+    return room_cache.respond(request, entry)
 
 @router.post("/rooms", response_model=RoomRead)
 async def create_room(
     room: RoomCreate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Create a new room (Admin only)"""
     # Check if room name already exists
-    existing_room = db.query(Room).filter(Room.name == room.name).first()
+    result = await db.execute(select(Room).where(Room.name == room.name))
+    existing_room = result.scalars().first()
     if existing_room:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,19 +133,115 @@ async def create_room(
     
     db_room = Room(**room.dict())
     db.add(db_room)
-    db.commit()
-    db.refresh(db_room)
+    await db.commit()
+    await db.refresh(db_room)
+    booking_index.room_saved(db_room)
+    room_cache.invalidate()
+    stats_counters.adjust(total_rooms=1, active_rooms=int(db_room.is_active))
     return db_room
 
+async def _bulk_rows(request: Request) -> list:
+    """Rows of a bulk import: a JSON array of objects, or CSV with a header line"""
+    body = (await request.body()).decode("utf-8-sig")
+    try:
+        if request.headers.get("content-type", "").startswith("text/csv"):
+            rows = [
+                {key: value for key, value in row.items() if value not in ("", None)}
+                for row in csv.DictReader(io.StringIO(body))
+            ]
+        else:
+            rows = json.loads(body)
+    except (ValueError, csv.Error):
+        rows = None
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array of rooms or CSV with a header row"
+        )
+    if len(rows) > MAX_BULK_ROOMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_ROOMS} rooms per request"
+        )
+    return rows
+
+@router.post("/rooms/bulk", response_model=BulkRoomResult)
+async def bulk_upsert_rooms(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
+):
+    """Create or update many rooms by name in one transaction (Admin only)
+
+    Accepts a JSON array of rooms, or text/csv with the columns name,
+    description, capacity, amenities and is_active. Valid rows are written
+    with a single multi-row INSERT ... ON CONFLICT (name) DO UPDATE.
+    """
+    results: List[BulkRoomRowResult] = []
+    valid = {}  # name -> (index, RoomCreate); the last row for a name wins
+    for index, row in enumerate(await _bulk_rows(request)):
+        try:
+            room = RoomCreate.model_validate(row)
+        except ValidationError as exc:
+            name = row.get("name") if isinstance(row, dict) else None
+            detail = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+            results.append(BulkRoomRowResult(index=index, name=name, status=BulkRoomStatus.INVALID, detail=detail))
+            continue
+        if room.name in valid:
+            earlier = valid[room.name][0]
+            results.append(BulkRoomRowResult(index=earlier, name=room.name, status=BulkRoomStatus.DUPLICATE,
+                                             detail=f"Replaced by row {index}"))
+        valid[room.name] = (index, room)
+
+    written = {}
+    previous = {}
+    if valid:
+        result = await db.execute(select(Room.name, Room.is_active).where(Room.name.in_(list(valid))))
+        previous = dict(result.all())
+        stmt = upsert_insert(db, Room).values([room.model_dump() for _, room in valid.values()])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Room.name],
+            set_={
+                "description": stmt.excluded.description,
+                "capacity": stmt.excluded.capacity,
+                "amenities": stmt.excluded.amenities,
+                "is_active": stmt.excluded.is_active,
+                "updated_at": func.now(),
+            }
+        ).returning(Room.id, Room.name, Room.is_active)
+        result = await db.execute(stmt)
+        written = {row.name: row for row in result.all()}
+        await db.commit()
+        room_cache.invalidate()
+
+    for name, (index, _) in valid.items():
+        row = written[name]
+        booking_index.room_saved(row)
+        results.append(BulkRoomRowResult(
+            index=index, name=name, room_id=row.id,
+            status=BulkRoomStatus.UPDATED if name in previous else BulkRoomStatus.CREATED
+        ))
+    results.sort(key=lambda r: r.index)
+
+    created = sum(r.status == BulkRoomStatus.CREATED for r in results)
+    updated = sum(r.status == BulkRoomStatus.UPDATED for r in results)
+    stats_counters.adjust(
+        total_rooms=created,
+        active_rooms=sum(int(row.is_active) - int(previous.get(name, False)) for name, row in written.items())
+    )
+    failed = sum(r.status == BulkRoomStatus.INVALID for r in results)
+    return BulkRoomResult(created=created, updated=updated, failed=failed, results=results)
+
 @router.put("/rooms/{room_id}", response_model=RoomRead)
 async def update_room(
     room_id: int,
     room_update: RoomUpdate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Update a room (Admin only)"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    result = await db.execute(select(Room).where(Room.id == room_id))
+    room = result.scalars().first()
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,7 +250,8 @@ async def update_room(
     
     # Check if new name conflicts with existing room
     if room_update.name and room_update.name != room.name:
-        existing_room = db.query(Room).filter(Room.name == room_update.name).first()
+        result = await db.execute(select(Room).where(Room.name == room_update.name))
+        existing_room = result.scalars().first()
         if existing_room:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -78,22 +259,27 @@ async def update_room(
             )
     
     # Update room fields
+    was_active = room.is_active
     update_data = room_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(room, field, value)
     
-    db.commit()
-    db.refresh(room)
+    await db.commit()
+    await db.refresh(room)
+    booking_index.room_saved(room)
+    room_cache.invalidate()
+    stats_counters.adjust(active_rooms=int(room.is_active) - int(was_active))
     return room
 
 @router.delete("/rooms/{room_id}", response_model=MessageResponse)
 async def delete_room(
     room_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin)  # Admin only!
+    db: AsyncSession = Depends(get_db),
+    current_admin: AuthenticatedUser = Depends(get_current_admin)  # Admin only!
 ):
     """Delete a room (Admin only)"""
-    room = db.query(Room).filter(Room.id == room_id).first()
+    result = await db.execute(select(Room).where(Room.id == room_id))
+    room = result.scalars().first()
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,6 +287,10 @@ async def delete_room(
         )
     
     # Soft delete by setting is_active to False
+    was_active = room.is_active
     room.is_active = False
-    db.commit()
+    await db.commit()
+    booking_index.room_saved(room)
+    room_cache.invalidate()
+    stats_counters.adjust(active_rooms=-int(was_active))
     return MessageResponse(message=f"Room '{room.name}' has been deactivated") 
\ No newline at end of file
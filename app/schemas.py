@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
+from app.config import MAX_BATCH_BOOKINGS, MAX_SERIES_OCCURRENCES
 
 # User schemas
 class UserBase(BaseModel):
@@ -54,6 +55,26 @@ class RoomRead(RoomBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+# Bulk room import
+class BulkRoomStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    INVALID = "invalid"
+    DUPLICATE = "duplicate"  # a later row with the same name wins
+
+class BulkRoomRowResult(BaseModel):
+    index: int
+    name: Optional[str] = None
+    status: BulkRoomStatus
+    room_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkRoomResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[BulkRoomRowResult]
+
 # Booking schemas
 class BookingStatus(str, Enum):
     CONFIRMED = "confirmed"
@@ -145,11 +166,114 @@ class BookingUpdate(BaseModel):
 class BookingRead(BookingBase):
     id: int
     user_id: int
+    series_id: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     user: Optional[UserRead] = None
     room: Optional[RoomRead] = None
 
+# Day grid of a room, one entry per bookable slot
+class SlotRead(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    available: bool
+
+class RoomDayAvailability(BaseModel):
+    room_id: int
+    date: date
+    slot_minutes: int
+    booked_mask: int  # bit i set when slot i is booked
+    slots: List[SlotRead]
+
+# Recurring booking schemas
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+class BookingSeriesCreate(BookingCreate):
+    """First occurrence plus the rule repeating it"""
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1, le=52)
+    count: Optional[int] = Field(None, ge=1, le=MAX_SERIES_OCCURRENCES)
+    until: Optional[date] = None
+
+    @validator('until', always=True)
+    def validate_end_of_series(cls, v, values):
+        if v is None and values.get('count') is None:
+            raise ValueError('Either count or until is required')
+        if v is not None and 'start_time' in values and v < values['start_time'].date():
+            raise ValueError('Series cannot end before its first occurrence')
+        return v
+
+class BookingSeriesRead(BaseModel):
+    id: int
+    user_id: int
+    room_id: int
+    frequency: RecurrenceFrequency
+    interval: int
+    start_time: datetime
+    end_time: datetime
+    until: Optional[date] = None
+    count: Optional[int] = None
+    status: BookingStatus
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    bookings: List[BookingRead] = []
+
+# Batch booking schemas
+class BatchMode(str, Enum):
+    ATOMIC = "atomic"            # all items are created, or none
+    BEST_EFFORT = "best_effort"  # create what fits, report the rest
+
+class BookingBatchCreate(BaseModel):
+    items: List[BookingCreate] = Field(..., min_length=1, max_length=MAX_BATCH_BOOKINGS)
+    mode: BatchMode = BatchMode.ATOMIC
+
+class BatchItemStatus(str, Enum):
+    CREATED = "created"
+    CONFLICT = "conflict"
+    ROOM_NOT_FOUND = "room_not_found"
+    NOT_CREATED = "not_created"  # valid, but the atomic batch was rejected
+
+class BookingBatchItemResult(BaseModel):
+    index: int
+    status: BatchItemStatus
+    booking: Optional[BookingRead] = None
+    detail: Optional[str] = None
+    conflicting_booking_ids: List[int] = []
+    conflicting_items: List[int] = []
+
+class BookingBatchResult(BaseModel):
+    mode: BatchMode
+    created: int
+    failed: int
+    results: List[BookingBatchItemResult]
+
+# Analytics schemas
+class Granularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+
+class RoomUtilization(BaseModel):
+    room_id: int
+    utilization: float    # share of bookable slots booked over the whole range
+    periods: List[float]  # same, per period, aligned with UtilizationReport.periods
+
+class UtilizationReport(BaseModel):
+    start_date: date
+    end_date: date
+    granularity: Granularity
+    slot_minutes: int
+    periods: List[date]  # first day of each period
+    overall: float
+    rooms: List[RoomUtilization]
+    heatmap_slots: List[str]    # slot start times, e.g. "08:00"
+    heatmap: List[List[float]]  # [weekday, Monday first][slot]: share of room-days booked
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 # Response schemas
 class MessageResponse(BaseModel):
     message: str
@@ -0,0 +1,85 @@
+"""Fast JSON path for the list endpoints
+
+Returning ORM objects makes FastAPI load every row as an entity, validate it
+into the response model from attributes, dump that to Python primitives and
+run the result through the stdlib JSON encoder. The list endpoints instead
+select exactly the response columns, map each row to a dict (nesting the
+`user__*`/`room__*` columns of joined tables), and hand the page to a
+TypeAdapter built once per schema: pydantic-core validates the dicts and
+writes the JSON bytes, both in Rust. `JSONBytesResponse` sends those bytes
+unchanged. The route keeps its `response_model` for the OpenAPI schema.
+
+Addresses read back from the users table were validated when they were
+stored, and EmailStr validation costs more than the rest of a row put
+together, so the row schemas take emails as plain strings. The JSON is the
+same.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.pagination import NEXT_CURSOR_HEADER
+from app.schemas import BookingRead, RoomRead, UserRead
+
+NESTED_SEPARATOR = "__"
+
+class UserRow(UserRead):
+    email: str
+
+class BookingRow(BookingRead):
+    user: Optional[UserRow] = None
+
+RoomList = TypeAdapter(List[RoomRead])
+BookingList = TypeAdapter(List[BookingRow])
+UserList = TypeAdapter(List[UserRow])
+
+class JSONBytesResponse(Response):
+    """A JSON response whose body was already serialized"""
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+def response_columns(model, schema: type[BaseModel], prefix: str = "") -> list:
+    """The model's columns that `schema` returns, labelled `prefix + name`"""
+    table_columns = model.__table__.columns
+    return [
+        getattr(model, name).label(prefix + name if prefix else name)
+        for name in schema.model_fields if name in table_columns
+    ]
+
+def related_columns(model, schema: type[BaseModel], relation: str) -> list:
+    """Columns of a joined table, to be nested under `relation` by `row_dicts`"""
+    return response_columns(model, schema, prefix=relation + NESTED_SEPARATOR)
+
+def row_dicts(rows: Iterable) -> List[Dict]:
+    """Plain dicts from result rows, with `relation__field` keys nested"""
+    rows = list(rows)
+    if not rows:
+        return []
+    keys = list(rows[0]._fields)
+    nested = [key.partition(NESTED_SEPARATOR) for key in keys]
+    if not any(separator for _, separator, _ in nested):
+        return [dict(zip(keys, row)) for row in rows]
+    dicts = []
+    for row in rows:
+        item: Dict = {}
+        for (relation, separator, field), value in zip(nested, row):
+            if separator:
+                item.setdefault(relation, {})[field] = value
+            else:
+                item[relation] = value
+        dicts.append(item)
+    return dicts
+
+def dump_list(adapter: TypeAdapter, rows: Sequence) -> bytes:
+    """Validate the mapped rows against the list schema and write them as JSON"""
+    return adapter.dump_json(adapter.validate_python(row_dicts(rows)))
+
+def list_response(adapter: TypeAdapter, rows: Sequence, response: Response) -> JSONBytesResponse:
+    """JSON list response, keeping the pagination header set on `response`"""
+    headers = {}
+    if NEXT_CURSOR_HEADER in response.headers:
+        headers[NEXT_CURSOR_HEADER] = response.headers[NEXT_CURSOR_HEADER]
+    return JSONBytesResponse(dump_list(adapter, rows), headers=headers)
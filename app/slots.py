@@ -0,0 +1,208 @@
+"""Per room-day bitmaps of booked half-hour slots
+
+Bookings only happen inside business hours and on slot boundaries, so a
+room-day is BUSINESS_HOURS split into SLOT_MINUTES slots: 20 bits, bit 0
+being the first slot after opening. A confirmed booking sets the bits of
+the slots it covers, so two bookings overlap exactly when their masks share
+a bit, and a day grid is a single primary-key read.
+
+The room_day_slots rows are written in the same transaction as the bookings
+they describe. Times are compared as naive UTC, like the booking index.
+Bookings that do not fit the grid (odd offsets, outside business hours)
+set the bits of every slot they touch and are always checked against the
+bookings table instead of the bitmap.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+
+from app.booking_index import normalize_time
+from app.database import upsert_insert
+from app.config import ALLOWED_TIME_INTERVALS, BUSINESS_HOURS
+from app.models import Booking, RoomDaySlots
+
+SLOT_MINUTES = 60 // len(ALLOWED_TIME_INTERVALS)
+DAY_OPENS = timedelta(hours=BUSINESS_HOURS["start"])
+DAY_CLOSES = timedelta(hours=BUSINESS_HOURS["end"])
+SLOT = timedelta(minutes=SLOT_MINUTES)
+SLOTS_PER_DAY = (DAY_CLOSES - DAY_OPENS) // SLOT
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+Interval = Tuple[datetime, datetime]
+
+def covering_masks(start_time: datetime, end_time: datetime) -> Dict[date, int]:
+    """Bits of every grid slot intersecting [start_time, end_time), per day"""
+    start, end = normalize_time(start_time), normalize_time(end_time)
+    masks = {}
+    day = start.date()
+    while datetime.combine(day, time()) < end:
+        midnight = datetime.combine(day, time())
+        low = max(start, midnight + DAY_OPENS)
+        high = min(end, midnight + DAY_CLOSES)
+        if low < high:
+            first = (low - midnight - DAY_OPENS) // SLOT
+            last = -((midnight + DAY_OPENS - high) // SLOT)  # ceiling division
+            masks[day] = ((1 << (last - first)) - 1) << first
+        day += timedelta(days=1)
+    return masks
+
+def _aligned(value: datetime) -> bool:
+    return (value - datetime.combine(value.date(), time())) % SLOT == timedelta(0)
+
+def exact_mask(start_time: datetime, end_time: datetime) -> Optional[Tuple[date, int]]:
+    """(day, mask) when the interval is exactly a run of grid slots, else None"""
+    start, end = normalize_time(start_time), normalize_time(end_time)
+    masks = covering_masks(start, end)
+    if len(masks) != 1 or not (_aligned(start) and _aligned(end)):
+        return None
+    (day, mask), = masks.items()
+    if bin(mask).count("1") * SLOT != end - start:
+        return None  # partly outside business hours
+    return day, mask
+
+def masks_from_bookings(rows: Iterable[Tuple[int, datetime, datetime]]) -> Dict[Tuple[int, date], int]:
+    """OR together (room_id, start, end) rows into per room-day masks"""
+    masks: Dict[Tuple[int, date], int] = {}
+    for room_id, start, end in rows:
+        for day, mask in covering_masks(start, end).items():
+            masks[room_id, day] = masks.get((room_id, day), 0) | mask
+    return masks
+
+def slot_times(day: date, mask: int) -> List[Tuple[datetime, datetime, bool]]:
+    """(start, end, booked) for each slot of the day"""
+    opens = datetime.combine(day, time()) + DAY_OPENS
+    return [
+        (opens + SLOT * i, opens + SLOT * (i + 1), bool(mask >> i & 1))
+        for i in range(SLOTS_PER_DAY)
+    ]
+
+async def reserve_slots(db, room_id: int, start_time: datetime, end_time: datetime) -> Optional[bool]:
+    """Atomically claim the slots of a booking if all of them are free
+
+    True when claimed, False when the bitmap shows a clash, None when the
+    interval does not fit the grid and the caller must check the bookings
+    table. One INSERT ... ON CONFLICT DO UPDATE ... WHERE mask & m = 0, so
+    two requests racing for the same slot cannot both succeed.
+    """
+    exact = exact_mask(start_time, end_time)
+    if exact is None:
+        return None
+    return await claim_mask(db, room_id, *exact)
+
+async def claim_mask(db, room_id: int, day: date, mask: int) -> bool:
+    """Set `mask` in one room-day bitmap if none of its bits are set yet"""
+    stmt = upsert_insert(db, RoomDaySlots).values(room_id=room_id, day=day, mask=mask)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RoomDaySlots.room_id, RoomDaySlots.day],
+        set_={"mask": RoomDaySlots.mask.op("|")(stmt.excluded.mask)},
+        where=RoomDaySlots.mask.op("&")(stmt.excluded.mask) == 0,
+    ).returning(RoomDaySlots.mask)
+    result = await db.execute(stmt)
+    return result.first() is not None
+
+async def claim_slots(db, room_id: int, intervals: Iterable[Interval]) -> bool:
+    """Set the bits of bookings already checked against the bookings table
+
+    On-grid intervals are claimed like claim_mask, one conditional upsert
+    for all of their days: False means a concurrent write took some of
+    their slots since the check, and the caller must roll back. Off-grid
+    intervals set the bits they touch unconditionally, since those bits
+    may be shared and the bookings table is what rules out their clashes.
+    """
+    claims: Dict[date, int] = {}
+    off_grid = []
+    for start, end in intervals:
+        exact = exact_mask(start, end)
+        if exact is None:
+            off_grid.append((start, end))
+        else:
+            claims[exact[0]] = claims.get(exact[0], 0) | exact[1]
+    if claims:
+        stmt = upsert_insert(db, RoomDaySlots)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RoomDaySlots.room_id, RoomDaySlots.day],
+            set_={"mask": RoomDaySlots.mask.op("|")(stmt.excluded.mask)},
+            where=RoomDaySlots.mask.op("&")(stmt.excluded.mask) == 0,
+        ).returning(RoomDaySlots.day)
+        result = await db.execute(stmt, [{"room_id": room_id, "day": d, "mask": m} for d, m in claims.items()])
+        if len(result.all()) != len(claims):
+            return False
+    await occupy_slots(db, room_id, off_grid)
+    return True
+
+async def occupy_slots(db, room_id: int, intervals: Iterable[Interval]):
+    """Set the bits of bookings already checked for conflicts, one statement for all"""
+    masks = masks_from_bookings((room_id, start, end) for start, end in intervals)
+    if not masks:
+        return
+    stmt = upsert_insert(db, RoomDaySlots)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RoomDaySlots.room_id, RoomDaySlots.day],
+        set_={"mask": RoomDaySlots.mask.op("|")(stmt.excluded.mask)},
+    )
+    await db.execute(stmt, [{"room_id": r, "day": d, "mask": m} for (r, d), m in masks.items()])
+
+async def release_slots(db, room_id: int, intervals: Iterable[Interval]):
+    """Clear the bits of bookings that were cancelled or moved away
+
+    Call after the booking changes are made in the session. Days holding an
+    off-grid booking are recomputed from the bookings table, since their
+    bits may be shared.
+    """
+    cleared: Dict[date, int] = {}
+    recompute = set()
+    for start, end in intervals:
+        exact = exact_mask(start, end)
+        if exact is None:
+            recompute.update(covering_masks(start, end))
+        else:
+            cleared[exact[0]] = cleared.get(exact[0], 0) | exact[1]
+    if cleared:
+        table = RoomDaySlots.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.room_id == bindparam("r"), table.c.day == bindparam("d"))
+            .values(mask=table.c.mask.op("&")(bindparam("keep"))),
+            [{"r": room_id, "d": day, "keep": FULL_DAY ^ mask} for day, mask in cleared.items()]
+        )
+    if recompute:
+        await db.flush()
+        await _recompute_days(db, room_id, recompute)
+
+async def _recompute_days(db, room_id: int, days: Iterable[date]):
+    windows = [
+        Booking.overlaps(datetime.combine(day, time()), datetime.combine(day, time()) + timedelta(days=1))
+        for day in days
+    ]
+    result = await db.execute(select(Booking.room_id, Booking.start_time, Booking.end_time).where(
+        Booking.room_id == room_id,
+        Booking.status == "confirmed",
+        or_(*windows)
+    ))
+    masks = masks_from_bookings(result.all())
+    stmt = upsert_insert(db, RoomDaySlots)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RoomDaySlots.room_id, RoomDaySlots.day],
+        set_={"mask": stmt.excluded.mask},
+    )
+    await db.execute(stmt, [
+        {"room_id": room_id, "day": day, "mask": masks.get((room_id, day), 0)} for day in days
+    ])
+
+async def rebuild_slots(db):
+    """Recompute every bitmap from the confirmed bookings, e.g. after a bulk load"""
+    await db.execute(RoomDaySlots.__table__.delete())
+    result = await db.stream(
+        select(Booking.room_id, Booking.start_time, Booking.end_time)
+        .where(Booking.status == "confirmed")
+        .execution_options(yield_per=10_000)
+    )
+    masks: Dict[Tuple[int, date], int] = {}
+    async for room_id, start, end in result:
+        for day, mask in covering_masks(start, end).items():
+            masks[room_id, day] = masks.get((room_id, day), 0) | mask
+    if masks:
+        await db.execute(RoomDaySlots.__table__.insert(), [
+            {"room_id": r, "day": d, "mask": m} for (r, d), m in masks.items()
+        ])
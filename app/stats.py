@@ -0,0 +1,102 @@
+"""System-wide row counts for the admin stats endpoint
+
+`count_stats` gets every number in one aggregate round trip. With
+STATS_CACHE_ENABLED the counts are also kept in process: the room, booking
+and user write paths adjust them after each commit, and a background job
+recounts from the database every STATS_RECONCILE_SECONDS to correct drift
+from other worker processes or from writes that bypass the API.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+
+from app.metrics import REGISTRY
+from app.models import Booking, Room, User
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_ENABLED = os.getenv("STATS_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+STATS_RECONCILE_SECONDS = int(os.getenv("STATS_RECONCILE_SECONDS", "60"))
+
+STAT_NAMES = ("total_rooms", "active_rooms", "total_bookings", "active_bookings", "total_users")
+
+def _count(model, *conditions):
+    query = select(func.count()).select_from(model)
+    if conditions:
+        query = query.where(*conditions)
+    return query.scalar_subquery()
+
+async def count_stats(db) -> Dict[str, int]:
+    """All counts from the database in a single SELECT"""
+    result = await db.execute(select(
+        _count(Room).label("total_rooms"),
+        _count(Room, Room.is_active == True).label("active_rooms"),
+        _count(Booking).label("total_bookings"),
+        _count(Booking, Booking.status == "confirmed").label("active_bookings"),
+        _count(User).label("total_users"),
+    ))
+    return dict(result.one()._mapping)
+
+class StatsCounters:
+    """In-process counts, adjusted by the write paths and periodically recounted"""
+
+    def __init__(self, enabled: bool = STATS_CACHE_ENABLED):
+        self.enabled = enabled
+        self.values: Dict[str, int] = {}
+        self.counted_at: Optional[datetime] = None  # wall clock of the last full count
+        self._counted_monotonic = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self.counted_at is not None
+
+    def age_seconds(self) -> float:
+        return round(time.monotonic() - self._counted_monotonic, 3) if self.ready else 0.0
+
+    def adjust(self, **deltas: int):
+        """Apply committed changes, e.g. adjust(total_bookings=1, active_bookings=1)"""
+        if not self.ready:
+            return
+        for name, delta in deltas.items():
+            self.values[name] += delta
+
+    def set_counts(self, values: Dict[str, int]):
+        self.values = dict(values)
+        self.counted_at = datetime.now(timezone.utc)
+        self._counted_monotonic = time.monotonic()
+
+    async def reconcile(self, db) -> Dict[str, int]:
+        """Recount from the database; returns the drift that was corrected"""
+        counted = await count_stats(db)
+        drift = {}
+        if self.ready:
+            drift = {name: counted[name] - self.values[name] for name in STAT_NAMES
+                     if counted[name] != self.values[name]}
+        self.set_counts(counted)
+        if drift:
+            stats_drift_corrections.inc()
+            logger.info("Stats counters corrected by %s", drift)
+        return drift
+
+    async def run_reconciliation(self, session_factory, interval: float = STATS_RECONCILE_SECONDS):
+        """Background loop: count once, then recount every `interval` seconds"""
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.reconcile(db)
+            except Exception:
+                logger.exception("Stats reconciliation failed")
+            await asyncio.sleep(interval)
+
+stats_counters = StatsCounters()
+
+# Metrics
+stats_drift_corrections = REGISTRY.counter("stats_drift_corrections_total",
+                                           "Reconciliations that found the in-process stats counters off")
+REGISTRY.gauge("stats_counters_age_seconds", "Seconds since the stats counters were last recounted",
+               function=lambda: stats_counters.age_seconds())
@@ -0,0 +1,70 @@
+"""Utilization analytics over a year of bookings.
+
+Usage:
+    python -m benchmarks.analytics --rooms 1000 --days 365 --per-day 3
+
+Seeds a SQLite database with `per_day` bookings per room per day for
+`days` days, then times `GET /api/v1/admin/analytics/utilization` over the
+whole range at day and week granularity.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+import httpx
+
+from benchmarks.common import SEED_EPOCH, login, run_server, seed_database, seed_user_email
+
+
+async def measure(base_url: str, days: int, repeat: int) -> list:
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        headers = await login(client, seed_user_email(0))  # user 0 is the seeded admin
+        params = {"from": SEED_EPOCH.date().isoformat(),
+                  "to": (SEED_EPOCH + timedelta(days=days - 1)).date().isoformat()}
+        results = []
+        for granularity in ("day", "week"):
+            timings, size = [], 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = await client.get("/api/v1/admin/analytics/utilization", headers=headers,
+                                            params=dict(params, granularity=granularity))
+                response.raise_for_status()
+                timings.append(time.perf_counter() - started)
+                size = len(response.content)
+            results.append({"granularity": granularity, "median_ms": round(statistics.median(timings) * 1000, 1),
+                            "response_kb": round(size / 1024, 1), "overall": response.json()["overall"]})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=1_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=3, help="bookings per room per day")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    bookings = args.rooms * args.days * args.per_day
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(seed_database(database_url, users=50, rooms=args.rooms, bookings=bookings,
+                                  per_day=args.per_day))
+        with run_server(database_url) as base_url:
+            results = asyncio.run(measure(base_url, args.days, args.repeat))
+
+    report = json.dumps({"benchmark": "analytics", "rooms": args.rooms, "days": args.days,
+                         "bookings": bookings, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Stress test for booking creation when everybody wants the same rooms.
+
+Usage:
+    python -m benchmarks.booking_contention --clients 200 --days 10
+
+For each mode (per-room admission queue on, then off) a fresh SQLite
+database is seeded and the app started. Then, day after day, `--clients`
+clients each try to book one random hour on that day in one of the
+`--hot-rooms` popular rooms, all at once. The report gives the throughput
+and latency of those bursts, the created/409 split, the SQL statements the
+server ran per request (from /metrics), and the number of overlapping
+confirmed bookings found afterwards, which must be zero.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import get_async_database_url
+from benchmarks.common import login, run_server, seed_database, seed_user_email, summarize
+
+OPENING_DAY = datetime(2030, 1, 7)
+OVERLAPS = text("""
+    SELECT count(*) FROM bookings a JOIN bookings b
+      ON a.room_id = b.room_id AND a.id < b.id
+     AND a.status = 'confirmed' AND b.status = 'confirmed'
+     AND a.start_time < b.end_time AND b.start_time < a.end_time
+""")
+
+
+def metric_value(metrics_text: str, name: str) -> float:
+    for line in metrics_text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    return 0.0
+
+
+async def contend(base_url: str, clients: int, days: int, hot_rooms: int, users: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        headers = [await login(client, seed_user_email(i)) for i in range(1, min(users, 11))]
+        queries_before = metric_value((await client.get("/metrics")).text, "db_queries_total")
+        latencies, statuses, errors = [], {}, 0
+
+        async def book(day: datetime):
+            nonlocal errors
+            start = day + timedelta(hours=8, minutes=30 * rng.randrange(19))
+            payload = {"room_id": rng.randrange(hot_rooms) + 1,
+                       "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()}
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/v1/bookings", json=payload, headers=rng.choice(headers))
+            except httpx.HTTPError:
+                errors += 1
+                return
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code in (200, 409):
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+        started = time.perf_counter()
+        for day in range(days):
+            await asyncio.gather(*(book(OPENING_DAY + timedelta(days=day)) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        queries = metric_value((await client.get("/metrics")).text, "db_queries_total") - queries_before
+
+    report = summarize(latencies, errors, elapsed)
+    report["statuses"] = {str(code): count for code, count in sorted(statuses.items())}
+    report["sql_statements_per_request"] = round(queries / max(len(latencies), 1), 2)
+    return report
+
+
+async def count_overlaps(database_url: str) -> int:
+    engine = create_async_engine(get_async_database_url(database_url))
+    async with engine.connect() as conn:
+        overlaps = (await conn.execute(OVERLAPS)).scalar()
+    await engine.dispose()
+    return overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200, help="concurrent booking attempts per day")
+    parser.add_argument("--days", type=int, default=10, help="days opened one after another")
+    parser.add_argument("--hot-rooms", type=int, default=2)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("admission", "inline"):
+            database_url = f"sqlite:///{os.path.join(tmp, mode + '.db')}"
+            asyncio.run(seed_database(database_url, users=args.users, rooms=20, bookings=0))
+            env = {"BOOKING_ADMISSION_ENABLED": "true" if mode == "admission" else "false"}
+            with run_server(database_url, extra_env=env) as base_url:
+                results[mode] = asyncio.run(
+                    contend(base_url, args.clients, args.days, args.hot_rooms, args.users, args.seed))
+            results[mode]["overlapping_bookings"] = asyncio.run(count_overlaps(database_url))
+
+    report = json.dumps({"benchmark": "booking_contention", "clients": args.clients, "days": args.days,
+                         "hot_rooms": args.hot_rooms, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Shared helpers for the benchmark scripts: seeding, serving and load generation."""
+import asyncio
+import contextlib
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import Base, get_async_database_url
+from app.models import Booking, Room, User
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED_PASSWORD = "benchmark-password"
+SEED_EPOCH = datetime(2024, 1, 1)  # a Monday, well in the past
+
+
+def seed_user_email(i: int) -> str:
+    return f"user{i}@bench.example.com"
+
+
+def _booking_rows(bookings: int, rooms: int, users: int, per_day: int = 10):
+    """Non-overlapping one-hour bookings, spread round-robin over rooms and business days."""
+    per_day = min(per_day, 10)  # 8:00-18:00 holds ten one-hour blocks
+    for i in range(bookings):
+        room_index, n = i % rooms, i // rooms
+        day, slot = divmod(n, per_day)
+        start = SEED_EPOCH + timedelta(days=day, hours=8 + slot)
+        yield {
+            "user_id": (i % users) + 1,
+            "room_id": room_index + 1,
+            "start_time": start,
+            "end_time": start + timedelta(hours=1),
+            "status": "confirmed",
+        }
+
+
+async def seed_database(url: str, users: int = 50, rooms: int = 20, bookings: int = 2000,
+                        batch_size: int = 10_000, per_day: int = 10):
+    """Create the schema and fill it with deterministic users, rooms and bookings.
+
+    Each room gets `per_day` one-hour bookings a day from 8:00, day after day.
+    """
+    from app.auth import get_password_hash
+    from app.slots import rebuild_slots
+
+    engine = create_async_engine(get_async_database_url(url))
+    hashed = get_password_hash(SEED_PASSWORD)  # one bcrypt round for every seeded user
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"email": seed_user_email(i), "hashed_password": hashed, "is_active": True,
+             "is_superuser": i == 0, "is_verified": True}
+            for i in range(users)
+        ])
+        await conn.execute(insert(Room), [
+            {"name": f"Room {i + 1}", "description": "Benchmark room", "capacity": 4 + (i % 20),
+             "amenities": "projector,whiteboard" if i % 2 else "tv", "is_active": True}
+            for i in range(rooms)
+        ])
+        batch = []
+        for row in _booking_rows(bookings, rooms, users, per_day):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                await conn.execute(insert(Booking), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(Booking), batch)
+        await rebuild_slots(conn)  # bulk inserts bypass the booking write paths
+    await engine.dispose()
+
+
+def free_port() -> int:
+    with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def run_server(database_url: str, cwd: str = ROOT, extra_env: dict = None, args: list = None,
+               production: bool = False):
+    """Start uvicorn for the app in a subprocess and yield its base URL once healthy.
+
+    With `production`, the server is `run.py --production` (workers from WEB_CONCURRENCY).
+    """
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=cwd, **(extra_env or {}))
+    if production:
+        command = [sys.executable, "run.py", "--production", "--host", "127.0.0.1", "--port", str(port)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                   "--port", str(port), "--log-level", "warning", "--no-access-log"] + (args or [])
+    process = subprocess.Popen(command, cwd=cwd, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("benchmark server failed to start")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    """Throughput and latency percentiles (milliseconds) for one measured run."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2) if ordered else 0.0,
+    }
+
+
+async def drive(client: httpx.AsyncClient, make_request, concurrency: int, duration: float,
+                ok_statuses=(200,)) -> dict:
+    """Run `concurrency` clients issuing `make_request(client, n)` back to back for `duration` seconds."""
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        n = worker_id
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, n)
+                if response.status_code in ok_statuses:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            n += concurrency
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str = SEED_PASSWORD) -> dict:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
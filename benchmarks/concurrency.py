@@ -0,0 +1,70 @@
+"""Requests/sec of the read endpoints at increasing numbers of concurrent clients.
+
+Usage:
+    python -m benchmarks.concurrency --concurrency 50 200 --duration 10
+
+Seeds a SQLite database, starts the app with uvicorn and drives a mix of
+`GET /api/v1/rooms`, `GET /api/v1/bookings` and room availability probes.
+Point `--base-url` at an already running server (for example a checkout of
+an older release using the same seeded database) to compare before/after.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+
+import httpx
+
+from benchmarks.common import drive, login, run_server, seed_database, seed_user_email
+
+
+async def measure(base_url: str, levels, duration: float, users: int, rooms: int) -> dict:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        headers = [await login(client, seed_user_email(i)) for i in range(min(users, 10))]
+
+        async def mixed(client, n):
+            kind = n % 3
+            if kind == 0:
+                return await client.get("/api/v1/rooms")
+            if kind == 1:
+                return await client.get("/api/v1/bookings", headers=headers[n % len(headers)])
+            room_id = (n % rooms) + 1
+            return await client.get(f"/api/v1/rooms/{room_id}/availability", params={
+                "start_time": "2030-01-07T10:00:00", "end_time": "2030-01-07T11:00:00"})
+
+        await drive(client, mixed, concurrency=10, duration=1)  # warm up connections and caches
+        return {str(level): await drive(client, mixed, level, duration) for level in levels}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=2_000)
+    parser.add_argument("--database-url", help="database to seed (default: temporary SQLite file)")
+    parser.add_argument("--base-url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        if not args.base_url:
+            asyncio.run(seed_database(database_url, args.users, args.rooms, args.bookings))
+        server = contextlib.nullcontext(args.base_url) if args.base_url else run_server(database_url)
+        with server as base_url:
+            results = asyncio.run(measure(base_url, args.concurrency, args.duration, args.users, args.rooms))
+
+    report = json.dumps({"benchmark": "concurrency", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Cost of the request and database instrumentation behind /metrics.
+
+Usage:
+    python -m benchmarks.metrics_overhead --rounds 3 --duration 5
+
+Seeds a SQLite database, then serves it alternately with METRICS_ENABLED
+off and on, driving the same mix of room reads, booking lists and
+availability probes against each. Rounds alternate so drift on the host
+hits both sides alike; the report compares median requests/sec. It also
+times the instrumentation code itself per request, which is the number to
+trust on a noisy machine.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import drive, login, run_server, seed_database, seed_user_email
+
+
+async def measure(base_url: str, duration: float, concurrency: int, users: int, rooms: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        headers = [await login(client, seed_user_email(i)) for i in range(min(users, 10))]
+
+        async def mixed(client, n):
+            kind = n % 3
+            if kind == 0:
+                return await client.get(f"/api/v1/rooms/{(n % rooms) + 1}")
+            if kind == 1:
+                return await client.get("/api/v1/bookings", headers=headers[n % len(headers)])
+            return await client.get(f"/api/v1/rooms/{(n % rooms) + 1}/availability", params={
+                "start_time": "2030-01-07T10:00:00", "end_time": "2030-01-07T11:00:00"})
+
+        await drive(client, mixed, concurrency=concurrency, duration=1)  # warm up
+        return await drive(client, mixed, concurrency, duration)
+
+
+def instrumentation_cost(iterations: int = 20_000) -> float:
+    """Microseconds the middleware bookkeeping and four cursor events add to one request"""
+    from app.instrumentation import (
+        RequestStats, _after_cursor_execute, _before_cursor_execute, current_request,
+        http_request_db_queries, http_request_db_seconds, http_request_seconds, http_requests,
+    )
+
+    class Connection:
+        info = {}
+
+    connection = Connection()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        request_started = time.perf_counter()
+        for _ in range(4):
+            _before_cursor_execute(connection, None, "", (), None, False)
+            _after_cursor_execute(connection, None, "", (), None, False)
+        elapsed = time.perf_counter() - request_started
+        current_request.reset(token)
+        http_requests.inc(method="GET", route="/bench", status=200)
+        http_request_seconds.observe(elapsed, method="GET", route="/bench")
+        http_request_db_queries.observe(stats.queries, route="/bench")
+        http_request_db_seconds.observe(stats.db_seconds, route="/bench")
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3, help="off/on pairs to run")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per measured run")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=2_000)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    runs = {"off": [], "on": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(seed_database(database_url, args.users, args.rooms, args.bookings))
+        for _ in range(args.rounds):
+            for mode in ("off", "on"):
+                env = {"METRICS_ENABLED": "true" if mode == "on" else "false"}
+                with run_server(database_url, extra_env=env) as base_url:
+                    runs[mode].append(asyncio.run(
+                        measure(base_url, args.duration, args.concurrency, args.users, args.rooms)))
+
+    off = statistics.median(run["requests_per_second"] for run in runs["off"])
+    on = statistics.median(run["requests_per_second"] for run in runs["on"])
+    cost_us = instrumentation_cost()
+    report = json.dumps({
+        "benchmark": "metrics_overhead",
+        "requests_per_second": {"off": off, "on": on},
+        "throughput_overhead_percent": round((off - on) / off * 100, 2),
+        "instrumentation_us_per_request": round(cost_us, 2),
+        # Share of the CPU time one request takes at the measured throughput
+        "instrumentation_percent_of_request": round(cost_us * on / 1e6 * 100, 3),
+        "runs": runs,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Page latency versus depth: OFFSET paging against keyset cursors.
+
+Usage:
+    python -m benchmarks.pagination --bookings 200000 --depths 0 1000 10000 100000 190000
+
+Seeds a SQLite database and times `GET /api/v1/admin/bookings` pages at
+each depth, once with the deprecated `skip` parameter and once with a
+cursor pointing at the same position. Cursor pages should stay flat.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import get_async_database_url
+from app.models import Booking
+from app.pagination import encode_cursor
+from benchmarks.common import login, run_server, seed_database, seed_user_email
+
+
+async def cursor_at(database_url: str, depth: int):
+    """The cursor a client would hold after reading `depth` rows"""
+    if depth == 0:
+        return None
+    engine = create_async_engine(get_async_database_url(database_url))
+    async with engine.connect() as conn:
+        row = (await conn.execute(
+            select(Booking.start_time, Booking.id)
+            .order_by(Booking.start_time, Booking.id)
+            .offset(depth - 1).limit(1)
+        )).one()
+    await engine.dispose()
+    return encode_cursor(list(row))
+
+
+async def time_page(client, headers, params, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get("/api/v1/admin/bookings", headers=headers, params=params)
+        response.raise_for_status()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+async def measure(base_url: str, database_url: str, depths, limit: int, repeat: int) -> list:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        headers = await login(client, seed_user_email(0))  # user 0 is the seeded admin
+        base = {"limit": limit, "include_related": "false"}
+        results = []
+        for depth in depths:
+            cursor = await cursor_at(database_url, depth)
+            offset_ms = await time_page(client, headers, dict(base, skip=depth), repeat)
+            cursor_ms = await time_page(client, headers, dict(base, cursor=cursor) if cursor else base, repeat)
+            results.append({"depth": depth, "offset_ms": offset_ms, "cursor_ms": cursor_ms})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=200_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1_000, 10_000, 100_000, 190_000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(seed_database(database_url, users=50, rooms=20, bookings=args.bookings))
+        with run_server(database_url) as base_url:
+            results = asyncio.run(measure(base_url, database_url, args.depths, args.limit, args.repeat))
+
+    report = json.dumps({"benchmark": "pagination", "bookings": args.bookings, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
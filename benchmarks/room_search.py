@@ -0,0 +1,112 @@
+"""Free-room search: one anti-join query against checking every room in turn.
+
+Usage:
+    python -m benchmarks.room_search --rooms 1000 --bookings 1000000
+
+Seeds a SQLite database and, for a window inside the seeded period (every
+room busy) and one after it (every room free), times
+`GET /api/v1/rooms/search` against the client-side loop it replaces:
+page through `GET /api/v1/rooms` and probe
+`GET /api/v1/rooms/{id}/availability` for each room.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+import httpx
+
+from benchmarks.common import SEED_EPOCH, run_server, seed_database
+
+
+async def search(client, window) -> list:
+    response = await client.get("/api/v1/rooms/search", params={
+        "start": window[0], "end": window[1], "min_capacity": 1, "limit": 500})
+    response.raise_for_status()
+    rooms = response.json()
+    while "X-Next-Cursor" in response.headers:
+        response = await client.get("/api/v1/rooms/search", params={
+            "start": window[0], "end": window[1], "min_capacity": 1, "limit": 500,
+            "cursor": response.headers["X-Next-Cursor"]})
+        response.raise_for_status()
+        rooms += response.json()
+    return [room["id"] for room in rooms]
+
+
+async def room_by_room(client, window) -> list:
+    room_ids, params = [], {"limit": 500}
+    while True:
+        response = await client.get("/api/v1/rooms", params=params)
+        response.raise_for_status()
+        room_ids += [room["id"] for room in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    free = []
+    for room_id in room_ids:
+        response = await client.get(f"/api/v1/rooms/{room_id}/availability", params={
+            "start_time": window[0], "end_time": window[1], "include_related": "false"})
+        response.raise_for_status()
+        if response.json()["available"]:
+            free.append(room_id)
+    return free
+
+
+async def time_calls(func, client, window, repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func(client, window)
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2), result
+
+
+async def measure(base_url: str, windows: dict, repeat: int, loop_repeat: int) -> list:
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        results = []
+        for label, window in windows.items():
+            search_ms, found = await time_calls(search, client, window, repeat)
+            loop_ms, expected = await time_calls(room_by_room, client, window, loop_repeat)
+            assert sorted(found) == sorted(expected), "search and per-room checks disagree"
+            results.append({"window": label, "free_rooms": len(found),
+                            "search_ms": search_ms, "room_by_room_ms": loop_ms})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=1_000)
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--loop-repeat", type=int, default=1, help="runs of the slow per-room loop")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    seeded_days = args.bookings // args.rooms // 10  # seed_database books 10 hourly slots a day
+    busy = SEED_EPOCH + timedelta(days=seeded_days // 2, hours=10)
+    free = SEED_EPOCH + timedelta(days=seeded_days + 7, hours=10)
+    windows = {
+        "busy": (busy.isoformat(), (busy + timedelta(hours=1)).isoformat()),
+        "free": (free.isoformat(), (free + timedelta(hours=1)).isoformat()),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(seed_database(database_url, users=50, rooms=args.rooms, bookings=args.bookings))
+        with run_server(database_url) as base_url:
+            results = asyncio.run(measure(base_url, windows, args.repeat, args.loop_repeat))
+
+    report = json.dumps({"benchmark": "room_search", "rooms": args.rooms, "bookings": args.bookings,
+                         "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Microbenchmark of list-response serialization: response_model versus the row path.
+
+Usage:
+    python -m benchmarks.serialization --rows 500 --repeat 50
+
+Loads one page of bookings (with their user and room) from a seeded SQLite
+database and times, per page:
+
+- response_model: ORM entities, selectin-loaded relations, validated and
+  encoded the way FastAPI does for a `response_model` route
+  (`serialize_response` then `JSONResponse`);
+- type_adapter_orm: the same ORM entities through a prebuilt TypeAdapter
+  and `dump_json`;
+- rows: the column select with joins, rows mapped to dicts, TypeAdapter
+  validation and `dump_json` - what the list endpoints now do.
+
+Each variant is timed for serialization alone and for query + serialization.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from typing import List
+
+from app.database import get_async_database_url
+from app.models import Booking
+from app.schemas import BookingRead
+from app.serialization import BookingList, dump_list
+from benchmarks.common import seed_database
+
+RESPONSE_FIELD = create_model_field(name="Response", type_=List[BookingRead], mode="serialization")
+
+
+async def response_model_body(bookings) -> bytes:
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=bookings)
+    return JSONResponse(content).body
+
+
+def orm_query(rows: int):
+    return select(Booking).options(*Booking.related_loader()).order_by(Booking.start_time, Booking.id).limit(rows)
+
+
+def rows_query(rows: int):
+    from app.routers.bookings import booking_list_query
+    return booking_list_query(True).order_by(Booking.start_time, Booking.id).limit(rows)
+
+
+async def timed(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+async def measure(database_url: str, rows: int, repeat: int) -> dict:
+    engine = create_async_engine(get_async_database_url(database_url))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as db:
+        entities = (await db.execute(orm_query(rows))).scalars().all()
+        result_rows = (await db.execute(rows_query(rows))).all()
+
+        bodies = {
+            "response_model": await response_model_body(entities),
+            "type_adapter_orm": BookingList.dump_json(BookingList.validate_python(entities, from_attributes=True)),
+            "rows": dump_list(BookingList, result_rows),
+        }
+        assert len({json.dumps(json.loads(body), sort_keys=True) for body in bodies.values()}) == 1, \
+            "serializers disagree"
+
+        async def type_adapter_orm():
+            return BookingList.dump_json(BookingList.validate_python(entities, from_attributes=True))
+
+        async def rows_only():
+            return dump_list(BookingList, result_rows)
+
+        async def fetch_response_model():
+            db.expunge_all()
+            return await response_model_body((await db.execute(orm_query(rows))).scalars().all())
+
+        async def fetch_type_adapter_orm():
+            db.expunge_all()
+            page = (await db.execute(orm_query(rows))).scalars().all()
+            return BookingList.dump_json(BookingList.validate_python(page, from_attributes=True))
+
+        async def fetch_rows():
+            return dump_list(BookingList, (await db.execute(rows_query(rows))).all())
+
+        results = {
+            "serialize_ms": {
+                "response_model": await timed(lambda: response_model_body(entities), repeat),
+                "type_adapter_orm": await timed(type_adapter_orm, repeat),
+                "rows": await timed(rows_only, repeat),
+            },
+            "query_and_serialize_ms": {
+                "response_model": await timed(fetch_response_model, repeat),
+                "type_adapter_orm": await timed(fetch_type_adapter_orm, repeat),
+                "rows": await timed(fetch_rows, repeat),
+            },
+            "body_bytes": len(bodies["rows"]),
+        }
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500, help="bookings per page")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(seed_database(database_url, users=50, rooms=20, bookings=max(args.rows, 2_000)))
+        results = asyncio.run(measure(database_url, args.rows, args.repeat))
+
+    report = json.dumps({"benchmark": "serialization", "rows": args.rows, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Worker cold start: import time, time to first response and first-request latency.
+
+Usage:
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --runs 5 --compare-tree /tmp/old-checkout
+
+Each run uses a fresh interpreter. `import` times `import app.main` and
+reports how much of it the framework (FastAPI and SQLAlchemy) accounts for.
+`serve` starts uvicorn on a seeded SQLite database and polls /health every
+few milliseconds. It records the time from spawning the process to the first
+200, then the latency of the first and the second database-backed request
+(GET /api/v1/rooms). The report gives medians in milliseconds.
+
+`--compare-tree` runs the same measurements against another checkout of the
+app (e.g. a `git worktree` of an older revision).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import ROOT, free_port, seed_database
+
+IMPORT_TIMER = """
+import json, time
+started = time.perf_counter()
+import fastapi, sqlalchemy.ext.asyncio
+framework = time.perf_counter()
+import app.main
+done = time.perf_counter()
+print(json.dumps({"import_ms": (done - started) * 1000, "framework_ms": (framework - started) * 1000}))
+"""
+
+
+def time_import(cwd: str, env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", IMPORT_TIMER], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    timings = json.loads(output)
+    timings["app_ms"] = timings["import_ms"] - timings["framework_ms"]
+    return timings
+
+
+def time_serve(cwd: str, env: dict) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env)
+    try:
+        with httpx.Client(base_url=base_url, timeout=5) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("benchmark server failed to start")
+                time.sleep(0.005)
+            ready = time.perf_counter()
+            requests = []
+            for _ in range(2):
+                request_started = time.perf_counter()
+                client.get("/api/v1/rooms").raise_for_status()
+                requests.append(time.perf_counter() - request_started)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {"ready_ms": (ready - started) * 1000, "first_request_ms": requests[0] * 1000,
+            "second_request_ms": requests[1] * 1000}
+
+
+def measure(cwd: str, database_url: str, runs: int) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=cwd)
+    samples = []
+    for _ in range(runs):
+        samples.append({**time_import(cwd, env), **time_serve(cwd, env)})
+    return {key: round(statistics.median(sample[key] for sample in samples), 1) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--compare-tree", help="another checkout of the app to measure the same way")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    trees = {"current": ROOT}
+    if args.compare_tree:
+        trees["compare"] = os.path.abspath(args.compare_tree)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(seed_database(database_url, users=10, rooms=20, bookings=200))
+        for name, tree in trees.items():
+            results[name] = measure(tree, database_url, args.runs)
+
+    report = json.dumps({"benchmark": "startup", "runs": args.runs, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
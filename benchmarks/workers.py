@@ -0,0 +1,103 @@
+"""Throughput of the production server (`run.py --production`) by number of workers.
+
+Usage:
+    python -m benchmarks.workers --workers 1 2 4 8 16 --concurrency 256 --client-processes 4
+
+For each worker count the app is started with WEB_CONCURRENCY set, then
+`--client-processes` load generators drive the read mix of
+`benchmarks.concurrency` (room list, own bookings, availability probes) for
+`--duration` seconds. Throughput is summed over the load generators;
+latency percentiles are the worst of theirs. `speedup` is the throughput
+relative to the first worker count, `efficiency` that speedup per added
+worker. Keep the load generators on cores the workers do not need when
+measuring scaling on large nodes.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+
+import httpx
+
+from benchmarks.common import drive, login, run_server, seed_database, seed_user_email
+
+USERS = 50
+ROOMS = 20
+
+
+async def generate_load(base_url: str, concurrency: int, duration: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        headers = [await login(client, seed_user_email(i)) for i in range(10)]
+
+        async def mixed(client, n):
+            kind = n % 3
+            if kind == 0:
+                return await client.get("/api/v1/rooms")
+            if kind == 1:
+                return await client.get("/api/v1/bookings", headers=headers[n % len(headers)])
+            return await client.get(f"/api/v1/rooms/{(n % ROOMS) + 1}/availability", params={
+                "start_time": "2030-01-07T10:00:00", "end_time": "2030-01-07T11:00:00"})
+
+        await drive(client, mixed, concurrency=min(concurrency, 10), duration=1)  # warm up every worker
+        return await drive(client, mixed, concurrency, duration)
+
+
+def _load_process(job) -> dict:
+    return asyncio.run(generate_load(*job))
+
+
+def measure(base_url: str, concurrency: int, duration: float, processes: int) -> dict:
+    per_process = max(1, concurrency // processes)
+    if processes == 1:
+        reports = [_load_process((base_url, per_process, duration))]
+    else:
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            reports = pool.map(_load_process, [(base_url, per_process, duration)] * processes)
+    return {
+        "requests": sum(report["requests"] for report in reports),
+        "errors": sum(report["errors"] for report in reports),
+        "requests_per_second": round(sum(report["requests_per_second"] for report in reports), 1),
+        "p50_ms": max(report["p50_ms"] for report in reports),
+        "p95_ms": max(report["p95_ms"] for report in reports),
+        "p99_ms": max(report["p99_ms"] for report in reports),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent clients in total")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--client-processes", type=int, default=1, help="load generator processes")
+    parser.add_argument("--database-url", help="database to seed (default: temporary SQLite file)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(seed_database(database_url, users=USERS, rooms=ROOMS, bookings=2_000))
+        for workers in args.workers:
+            with run_server(database_url, production=True, extra_env={"WEB_CONCURRENCY": str(workers)}) as base_url:
+                results[str(workers)] = measure(base_url, args.concurrency, args.duration, args.client_processes)
+
+    baseline_workers = args.workers[0]
+    baseline = results[str(baseline_workers)]["requests_per_second"] or 1.0
+    for workers in args.workers:
+        report = results[str(workers)]
+        report["speedup"] = round(report["requests_per_second"] / baseline, 2)
+        report["efficiency"] = round(report["speedup"] * baseline_workers / workers, 2)
+
+    report = json.dumps({"benchmark": "workers", "cpus": os.cpu_count(), "concurrency": args.concurrency,
+                         "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
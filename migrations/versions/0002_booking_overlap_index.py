@@ -0,0 +1,33 @@
+"""Partial composite index for booking conflict checks
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Overlap checks filter on room_id + a time window over confirmed bookings only
+    op.create_index(
+        'ix_bookings_room_time_confirmed', 'bookings', ['room_id', 'start_time', 'end_time'],
+        postgresql_where=sa.text("status = 'confirmed'"),
+        sqlite_where=sa.text("status = 'confirmed'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_room_time_confirmed', table_name='bookings')
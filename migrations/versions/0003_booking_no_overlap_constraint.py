@@ -0,0 +1,58 @@
+"""Optional Postgres exclusion constraint against double bookings
+
+Makes two confirmed bookings of the same room with intersecting
+[start_time, end_time) ranges impossible at the database level, closing the
+race between the conflict check and the insert.
+
+Only applied on PostgreSQL, and only when enabled with
+
+    alembic -x booking_exclusion=true upgrade head
+
+or BOOKING_EXCLUSION_CONSTRAINT=true in the environment. Existing
+overlapping confirmed bookings must be cleaned up first or the upgrade fails.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:20:00
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import context, op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINT_NAME = 'bookings_no_overlap'
+
+
+def _enabled() -> bool:
+    value = context.get_x_argument(as_dictionary=True).get(
+        'booking_exclusion', os.getenv('BOOKING_EXCLUSION_CONSTRAINT', 'false')
+    )
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql' or not _enabled():
+        return
+    # btree_gist lets the plain integer room_id take part in a GiST index
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        f"ALTER TABLE bookings ADD CONSTRAINT {CONSTRAINT_NAME} "
+        "EXCLUDE USING gist (room_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&) "
+        "WHERE (status = 'confirmed')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f'ALTER TABLE bookings DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}')
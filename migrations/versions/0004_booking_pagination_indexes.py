@@ -0,0 +1,29 @@
+"""Indexes for keyset pagination of booking lists
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bookings_user_start', 'bookings', ['user_id', 'start_time', 'id'])
+    op.create_index('ix_bookings_start', 'bookings', ['start_time', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_start', table_name='bookings')
+    op.drop_index('ix_bookings_user_start', table_name='bookings')
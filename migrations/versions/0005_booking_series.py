@@ -0,0 +1,57 @@
+"""Recurring booking series
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'booking_series',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('frequency', sa.String(length=10), nullable=False),
+        sa.Column('interval', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('until', sa.Date()),
+        sa.Column('count', sa.Integer()),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_booking_series_id', 'booking_series', ['id'])
+
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.add_column(sa.Column('series_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_bookings_series_id', 'booking_series', ['series_id'], ['id'])
+        batch_op.create_index('ix_bookings_series', ['series_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.drop_index('ix_bookings_series')
+        batch_op.drop_constraint('fk_bookings_series_id', type_='foreignkey')
+        batch_op.drop_column('series_id')
+
+    op.drop_index('ix_booking_series_id', table_name='booking_series')
+    op.drop_table('booking_series')
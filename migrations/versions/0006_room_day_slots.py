@@ -0,0 +1,84 @@
+"""Per room-day slot bitmaps, backfilled from confirmed bookings
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 12:00:00
+
+"""
+from datetime import datetime, time, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The slot grid at this revision: 08:00-18:00 in half-hour slots. Frozen
+# here rather than imported from the app, which may have moved on since.
+DAY_OPENS = timedelta(hours=8)
+DAY_CLOSES = timedelta(hours=18)
+SLOT = timedelta(minutes=30)
+
+
+def _naive_utc(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _covering_masks(start, end):
+    """Bits of every slot intersecting [start, end), per day"""
+    start, end = _naive_utc(start), _naive_utc(end)
+    day = start.date()
+    while datetime.combine(day, time()) < end:
+        midnight = datetime.combine(day, time())
+        low = max(start, midnight + DAY_OPENS)
+        high = min(end, midnight + DAY_CLOSES)
+        if low < high:
+            first = (low - midnight - DAY_OPENS) // SLOT
+            last = -((midnight + DAY_OPENS - high) // SLOT)
+            yield day, ((1 << (last - first)) - 1) << first
+        day += timedelta(days=1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    room_day_slots = op.create_table(
+        'room_day_slots',
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('mask', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id']),
+        sa.PrimaryKeyConstraint('room_id', 'day'),
+    )
+
+    bookings = sa.table(
+        'bookings',
+        sa.column('room_id', sa.Integer()),
+        sa.column('start_time', sa.DateTime(timezone=True)),
+        sa.column('end_time', sa.DateTime(timezone=True)),
+        sa.column('status', sa.String()),
+    )
+    rows = op.get_bind().execute(
+        sa.select(bookings.c.room_id, bookings.c.start_time, bookings.c.end_time)
+        .where(bookings.c.status == 'confirmed')
+        .execution_options(yield_per=10_000)
+    )
+    masks = {}
+    for room_id, start, end in rows:
+        for day, mask in _covering_masks(start, end):
+            masks[room_id, day] = masks.get((room_id, day), 0) | mask
+    if masks:
+        op.bulk_insert(room_day_slots, [
+            {'room_id': room_id, 'day': day, 'mask': mask} for (room_id, day), mask in masks.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('room_day_slots')
@@ -1,12 +1,104 @@
 #!/usr/bin/env python3
 """
 Entry point for the Meeting Room Booking System
+
+    python run.py                  development server with auto-reload on port 5000
+    python run.py --production     production server, tuned by the environment below
+
+Production settings (environment variables):
+
+    WEB_CONCURRENCY      worker processes (default: one per CPU available to the container)
+    KEEPALIVE_SECONDS    idle keep-alive; keep it above the load balancer's idle timeout (65)
+    BACKLOG              pending connections the listening socket queues (2048)
+    MAX_REQUESTS         requests after which a worker exits and is replaced, bounding
+                         memory growth; 0 disables recycling (10000)
+    MAX_REQUESTS_JITTER  each worker adds a random 0..N to MAX_REQUESTS, so workers
+                         started together are not all replaced at once (1000)
+    GRACEFUL_TIMEOUT     seconds a worker has on SIGTERM to finish in-flight requests (30)
+
+Workers are spawned, not forked: each one imports the app in a fresh
+interpreter and creates its engine, pools and caches in the app lifespan, so
+no connection or thread is ever shared between processes. Every worker has
+its own connection pool; size DB_POOL_SIZE/DB_MAX_OVERFLOW so that workers x
+(pool size + overflow) stays below the database's connection limit.
+
+Metrics are kept per process as well: GET /metrics reports the counters of
+whichever worker answered the scrape, not a sum over all workers.
 """
+import argparse
+import importlib.util
+import os
+import random
+
 import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+def available_cpus() -> int:
+    """CPUs this process may use: its affinity mask, capped by a cgroup v2 CPU quota"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as fh:
+            quota, period = fh.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+class WorkerConfig(uvicorn.Config):
+    """uvicorn config drawing each worker's request limit when the worker starts
+
+    The supervisor hands the config to every spawned worker, restarts
+    included, by pickling it; unpickling adds 0..max_requests_jitter to the
+    limit, so each worker gets its own.
+    """
+
+    def __init__(self, *args, max_requests_jitter: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_requests_jitter = max_requests_jitter
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.limit_max_requests and self.max_requests_jitter:
+            self.limit_max_requests += random.randint(0, self.max_requests_jitter)
+
+def production_options() -> dict:
+    max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+    return {
+        "workers": int(os.getenv("WEB_CONCURRENCY", "0")) or available_cpus(),
+        # uvloop and httptools are C implementations of the event loop and HTTP parser
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+        "timeout_keep_alive": int(os.getenv("KEEPALIVE_SECONDS", "65")),
+        "backlog": int(os.getenv("BACKLOG", "2048")),
+        "limit_max_requests": max_requests or None,
+        "max_requests_jitter": int(os.getenv("MAX_REQUESTS_JITTER", "1000")),
+        "timeout_graceful_shutdown": int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        "access_log": False,
+    }
+
+def serve_production(host: str, port: int):
+    """uvicorn.run for a WorkerConfig: the supervisor when there are several workers"""
+    config = WorkerConfig("app.main:app", host=host, port=port, **production_options())
+    server = uvicorn.Server(config)
+    if config.workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        port=5000,
-        reload=True  # Enable auto-reload for development
-    ) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--production", action="store_true", help="production server without auto-reload")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.production:
+        serve_production(args.host or "0.0.0.0", args.port or int(os.getenv("PORT", "8000")))
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host or "127.0.0.1",
+            port=args.port or 5000,
+            reload=True  # Enable auto-reload for development
+        )
@@ -1,54 +1,93 @@
 """Test configuration and fixtures."""
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.database import get_db, Base
-from app.main import app
 import os
 
-# Test database URL
+# Test database URL, set before the app creates its engine
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+os.environ.setdefault("DATABASE_URL", SQLALCHEMY_DATABASE_URL)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+import asyncio
+import pytest
+from contextlib import asynccontextmanager, contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth import token_cache, user_cache
+from app.http_cache import room_cache
+from app.database import Base, SessionLocal, get_db, get_read_db, get_session_factory
+from app.main import app
 
 @pytest.fixture(scope="session")
 def db_engine():
-    """Create test database engine."""
-    Base.metadata.create_all(bind=engine)
+    """Create test database engine and schema (the app no longer creates tables itself)."""
+    engine = SessionLocal.engine
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()  # pooled connections belong to this event loop
+
+    asyncio.run(create_tables())
     yield engine
     # Clean up test database
     if os.path.exists("./test.db"):
         os.remove("./test.db")
 
 @pytest.fixture
-def db_session(db_engine):
-    """Create test database session."""
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
-    
-    yield session
-    
-    session.close()
-    transaction.rollback()
-    connection.close()
+def client(db_engine):
+    """Create test client with test database.
+
+    The app lifespan opens the engine; each test then runs inside a
+    transaction on the client's event loop that is rolled back afterwards.
+    """
+    # Process-wide caches must not leak rows from rolled-back transactions
+    user_cache.clear()
+    token_cache.clear()
+    room_cache.invalidate()
+    with TestClient(app) as test_client:
+        portal = test_client.portal
+        connection = portal.call(db_engine.connect)
+        transaction = portal.call(connection.begin)
+        session = AsyncSession(bind=connection, autoflush=False, expire_on_commit=False)
+
+        async def override_get_db():
+            yield session
+
+        @asynccontextmanager
+        async def session_factory():
+            yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        app.dependency_overrides[get_session_factory] = lambda: session_factory
+        test_client.db_session = session
+        yield test_client
+        app.dependency_overrides.clear()
+
+        portal.call(session.close)
+        portal.call(transaction.rollback)
+        portal.call(connection.close)
+
+@pytest.fixture
+def db_session(client):
+    """The session the app uses in this test; run coroutines with client.portal.call."""
+    return client.db_session
 
 @pytest.fixture
-def client(db_session):
-    """Create test client with test database."""
-    def override_get_db():
+def count_queries(db_engine):
+    """Context manager counting the SQL statements executed inside it."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
         try:
-            yield db_session
+            yield statements
         finally:
-            pass
-
-    app.dependency_overrides[get_db] = override_get_db
-    yield TestClient(app)
-    app.dependency_overrides.clear()
+            event.remove(db_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return counter
 
 @pytest.fixture
 def test_user_data():
@@ -63,7 +102,38 @@ def test_user_data():
 def test_admin_data():
     """Test admin data."""
     return {
-        "email": "admin@example.com", 
+        "email": "admin@example.com",
         "password": "adminpassword123",
         "is_admin": True
-    }
\ No newline at end of file
+    }
+
+def _login_headers(client, user_data):
+    """Register a user and return bearer auth headers for them."""
+    client.post("/auth/register", json=user_data)
+    login_response = client.post("/auth/login", json={
+        "email": user_data["email"],
+        "password": user_data["password"]
+    })
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def auth_headers(client, test_user_data):
+    """Auth headers for a regular user."""
+    return _login_headers(client, test_user_data)
+
+@pytest.fixture
+def admin_headers(client, test_admin_data):
+    """Auth headers for an admin user."""
+    return _login_headers(client, test_admin_data)
+
+@pytest.fixture
+def room(client, admin_headers):
+    """An active room created through the API."""
+    response = client.post("/api/v1/rooms", json={
+        "name": "Board Room",
+        "description": "Main board room",
+        "capacity": 12,
+        "amenities": "projector,whiteboard"
+    }, headers=admin_headers)
+    return response.json()
@@ -0,0 +1,158 @@
+"""Test the per-room booking admission queue."""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.admission import BookingConflict, admission_rejected, booking_admission
+from app.database import get_session_factory
+from app.instrumentation import RequestStats, current_request
+from app.main import app
+from app.models import Booking
+from app.schemas import BookingCreate
+
+def _tomorrow(hour, minute=0):
+    day = datetime.now() + timedelta(days=1)
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+def test_concurrent_requests_never_double_book(client, auth_headers, room, db_session):
+    """Dozens of clients racing for the same slots get one booking per slot."""
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    session_factory = app.dependency_overrides[get_session_factory]()
+    # 40 one-hour requests starting 9:00-11:30, most of them overlapping others
+    requests = [
+        BookingCreate(room_id=room["id"], start_time=_tomorrow(9 + n % 3, 30 * (n % 2)),
+                      end_time=_tomorrow(10 + n % 3, 30 * (n % 2)))
+        for n in range(40)
+    ]
+    rejected_before = admission_rejected.value()
+
+    async def race():
+        return await asyncio.gather(
+            *(booking_admission.submit(session_factory, user_id, request) for request in requests),
+            return_exceptions=True
+        )
+
+    outcomes = client.portal.call(race)
+    created = [outcome for outcome in outcomes if isinstance(outcome, Booking)]
+    assert all(isinstance(outcome, (Booking, BookingConflict)) for outcome in outcomes)
+    # First come, first served: the requests that fit among those queued before them
+    winners = []
+    for request in requests:
+        if not any(w.start_time < request.end_time and w.end_time > request.start_time for w in winners):
+            winners.append(request)
+    assert [(b.start_time, b.end_time) for b in created] == [(w.start_time, w.end_time) for w in winners]
+    # Losers waited for the request ahead of them, then were refused without touching the database
+    assert admission_rejected.value() - rejected_before == len(outcomes) - len(winners)
+    for request, outcome in zip(requests, outcomes):
+        if isinstance(outcome, BookingConflict):
+            assert outcome.booking_ids and all(
+                b.start_time < request.end_time and b.end_time > request.start_time
+                for b in created if b.id in outcome.booking_ids)
+
+    async def confirmed():
+        result = await db_session.execute(select(Booking.start_time, Booking.end_time).where(
+            Booking.room_id == room["id"], Booking.status == "confirmed").order_by(Booking.start_time))
+        return result.all()
+
+    rows = client.portal.call(confirmed)
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(rows, rows[1:]))
+    assert booking_admission.rooms == {}
+
+def test_admitted_booking_has_related_objects(client, auth_headers, room):
+    """Bookings created through the queue serialize like before, and clash like before."""
+    payload = {
+        "room_id": room["id"],
+        "start_time": _tomorrow(14).isoformat(),
+        "end_time": _tomorrow(15).isoformat()
+    }
+    response = client.post("/api/v1/bookings", json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["room"]["id"] == room["id"]
+    assert data["user"]["email"] == "test@example.com"
+
+    response = client.post("/api/v1/bookings", json=payload, headers=auth_headers)
+    assert response.status_code == 409
+    assert response.headers["X-Conflicting-Bookings"] == f"[{data['id']}]"
+
+    response = client.post("/api/v1/bookings", json=dict(payload, room_id=999999), headers=auth_headers)
+    assert response.status_code == 404
+
+def test_drain_task_is_not_billed_to_the_submitter(client, auth_headers, room):
+    """The first request for a room starts the drain task; its SQL is not counted as that request's."""
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    session_factory = app.dependency_overrides[get_session_factory]()
+    request = BookingCreate(room_id=room["id"], start_time=_tomorrow(16), end_time=_tomorrow(17))
+
+    async def submit():
+        stats = RequestStats()
+        current_request.set(stats)
+        await booking_admission.submit(session_factory, user_id, request)
+        return stats
+
+    assert client.portal.call(submit).queries == 0
+
+def test_request_behind_a_failing_one_is_admitted(client, auth_headers, room, db_session):
+    """A request overlapping a queued one that then fails is not refused on its account."""
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    session_factory = app.dependency_overrides[get_session_factory]()
+    existing = client.post("/api/v1/bookings", json={
+        "room_id": room["id"], "start_time": _tomorrow(9).isoformat(), "end_time": _tomorrow(10).isoformat()
+    }, headers=auth_headers).json()
+    # The first clashes with the existing booking; the second only overlaps the first
+    requests = [
+        BookingCreate(room_id=room["id"], start_time=_tomorrow(9, 30), end_time=_tomorrow(10, 30)),
+        BookingCreate(room_id=room["id"], start_time=_tomorrow(10), end_time=_tomorrow(11)),
+    ]
+
+    async def race():
+        return await asyncio.gather(
+            *(booking_admission.submit(session_factory, user_id, request) for request in requests),
+            return_exceptions=True
+        )
+
+    first, second = client.portal.call(race)
+    assert isinstance(first, BookingConflict) and first.booking_ids == [existing["id"]]
+    assert isinstance(second, Booking)
+
+def test_rejected_insert_only_fails_the_clashing_request(client, auth_headers, room, db_session):
+    """When the batch insert violates a constraint, the other requests of the batch are still admitted."""
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+
+    async def savepoint_session():
+        # Rollbacks in the queue then stay inside the test's transaction
+        connection = await db_session.connection()
+        await connection.exec_driver_sql(
+            "CREATE TEMP TRIGGER reject_nine BEFORE INSERT ON bookings "
+            "WHEN strftime('%H', NEW.start_time) = '09' BEGIN SELECT RAISE(ABORT, 'overlap'); END")
+        return AsyncSession(bind=connection, join_transaction_mode="create_savepoint",
+                            autoflush=False, expire_on_commit=False)
+
+    session = client.portal.call(savepoint_session)
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    # The trigger stands in for the Postgres exclusion constraint catching a booking made elsewhere
+    requests = [
+        BookingCreate(room_id=room["id"], start_time=_tomorrow(9), end_time=_tomorrow(10)),
+        BookingCreate(room_id=room["id"], start_time=_tomorrow(11), end_time=_tomorrow(12)),
+    ]
+
+    async def race():
+        try:
+            return await asyncio.gather(
+                *(booking_admission.submit(session_factory, user_id, request) for request in requests),
+                return_exceptions=True
+            )
+        finally:
+            await session.close()
+            await (await db_session.connection()).exec_driver_sql("DROP TRIGGER reject_nine")
+
+    rejected, admitted = client.portal.call(race)
+    assert isinstance(rejected, BookingConflict)
+    assert isinstance(admitted, Booking) and admitted.id is not None
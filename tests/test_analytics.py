@@ -0,0 +1,37 @@
+"""Test the utilization analytics endpoint."""
+from datetime import date, datetime, timedelta
+from app.analytics import period_starts
+
+def test_period_starts():
+    """Weeks start on Monday but are clipped to the requested range."""
+    assert period_starts(date(2030, 1, 9), date(2030, 1, 21), "week") == [
+        date(2030, 1, 9), date(2030, 1, 14), date(2030, 1, 21)
+    ]
+    assert len(period_starts(date(2030, 1, 1), date(2030, 12, 31), "day")) == 365
+
+def test_utilization_report(client, admin_headers, auth_headers, room):
+    """Booked slots become per-period shares and a weekday heatmap."""
+    monday = date.today() + timedelta(days=7 - date.today().weekday())
+    at = lambda day, hour: datetime.combine(monday + timedelta(days=day), datetime.min.time()).replace(hour=hour)
+    for day, start, end in [(0, 8, 12), (0, 12, 16), (0, 16, 18), (2, 9, 10)]:  # all of Monday, one hour Wednesday
+        response = client.post("/api/v1/bookings", json={
+            "room_id": room["id"], "start_time": at(day, start).isoformat(), "end_time": at(day, end).isoformat()
+        }, headers=auth_headers)
+        assert response.status_code == 200
+
+    params = {"from": monday.isoformat(), "to": (monday + timedelta(days=13)).isoformat()}
+    data = client.get("/api/v1/admin/analytics/utilization", params=params, headers=admin_headers).json()
+    assert len(data["periods"]) == 14
+    (usage,) = data["rooms"]
+    assert usage["periods"][:3] == [1.0, 0.0, 0.1]
+    assert usage["utilization"] == round(22 / (14 * 20), 4)
+    assert data["heatmap_slots"][2] == "09:00"
+    assert data["heatmap"][0] == [0.5] * 20   # every Monday slot, one Monday in two
+    assert data["heatmap"][2][2:4] == [0.5, 0.5]
+
+    weekly = client.get("/api/v1/admin/analytics/utilization", params=dict(params, granularity="week"),
+                        headers=admin_headers).json()
+    assert weekly["rooms"][0]["periods"] == [round(22 / 140, 4), 0.0]
+
+    params["to"] = (monday - timedelta(days=1)).isoformat()
+    assert client.get("/api/v1/admin/analytics/utilization", params=params, headers=admin_headers).status_code == 400
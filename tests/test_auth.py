@@ -73,4 +73,74 @@ class TestAuth:
         response = client.get("/protected", headers=headers)
         assert response.status_code == 200
         data = response.json()
-        assert test_user_data["email"] in data["message"]
\ No newline at end of file
+        assert test_user_data["email"] in data["message"]
+    
+    def test_current_user_is_cached(self, client, auth_headers):
+        """Repeated authenticated calls are served from the user cache."""
+        from app.auth import user_cache
+        client.get("/users/me", headers=auth_headers)
+        hits = user_cache.hits
+
+        response = client.get("/users/me", headers=auth_headers)
+        assert response.status_code == 200
+        assert user_cache.hits == hits + 1
+
+    def test_make_admin_revokes_tokens(self, client, auth_headers, admin_headers, test_user_data):
+        """Promotion revokes the user's tokens at once; a new login carries the admin role."""
+        user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+        assert client.get("/api/v1/admin/users", headers=auth_headers).status_code == 403
+
+        response = client.post(f"/api/v1/admin/make-admin/{user_id}", headers=admin_headers)
+        assert response.status_code == 200
+        response = client.get("/api/v1/admin/users", headers=auth_headers)
+        assert response.status_code == 401
+        assert "revoked" in response.json()["detail"]
+
+        login = client.post("/auth/login", json={"email": test_user_data["email"],
+                                                 "password": test_user_data["password"]}).json()
+        headers = {"Authorization": f"Bearer {login['access_token']}"}
+        assert client.get("/api/v1/admin/users", headers=headers).status_code == 200
+
+    def test_identity_comes_from_the_token(self, client, auth_headers, count_queries):
+        """With the token state cached, identity-only routes run no auth queries."""
+        client.get("/users/me", headers=auth_headers)
+        with count_queries() as statements:
+            response = client.get("/protected", headers=auth_headers)
+        assert response.status_code == 200
+        assert statements == []
+
+    def test_deactivated_user_is_rejected(self, client, auth_headers, admin_headers):
+        """Deactivating a user invalidates their cached identity and blocks their token."""
+        user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+
+        response = client.post(f"/api/v1/admin/deactivate/{user_id}", headers=admin_headers)
+        assert response.status_code == 200
+        response = client.get("/users/me", headers=auth_headers)
+        assert response.status_code == 403
+        assert response.json()["detail"] == "Inactive user"
+
+    def test_verified_token_is_cached_until_it_expires(self, client, auth_headers):
+        """A token is signature-checked once; its cache entry expires with it and can be evicted."""
+        import time
+        from datetime import timedelta
+        from app.auth import (_token_key, create_access_token, evict_cached_token, token_cache, token_decodes,
+                              token_decode_seconds_saved)
+        client.get("/users/me", headers=auth_headers)
+        decodes, saved = token_decodes.value(), token_decode_seconds_saved.value()
+
+        assert client.get("/users/me", headers=auth_headers).status_code == 200
+        assert token_decodes.value() == decodes
+        assert token_decode_seconds_saved.value() > saved
+
+        token = auth_headers["Authorization"].split()[1]
+        assert evict_cached_token(token)
+        assert client.get("/users/me", headers=auth_headers).status_code == 200
+        assert token_decodes.value() == decodes + 1
+
+        user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+        claims = {"sub": "test@example.com", "uid": user_id, "role": "user", "ver": 0}
+        short_lived = create_access_token(claims, expires_delta=timedelta(seconds=2))
+        headers = {"Authorization": f"Bearer {short_lived}"}
+        assert client.get("/users/me", headers=headers).status_code == 200
+        _, expires_at = token_cache._data[_token_key(short_lived)]
+        assert expires_at - time.monotonic() <= 2
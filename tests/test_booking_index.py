@@ -0,0 +1,134 @@
+"""Test the in-process booking interval index."""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from app.booking_index import BookingIndex, RoomIntervals, booking_index
+from app.models import Booking, Room
+
+DAY = (datetime.now() + timedelta(days=2)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def at(hours):
+    return DAY + timedelta(hours=hours)
+
+def test_room_intervals_find_and_reject_overlap():
+    """Lookups return exactly the overlapping bookings; overlapping inserts are refused."""
+    intervals = RoomIntervals()
+    assert intervals.add(1, at(9), at(10))
+    assert intervals.add(3, at(13), at(14))
+    assert intervals.add(2, at(10), at(11))
+
+    assert intervals.find(at(8), at(9)) == []
+    assert intervals.find(at(9.5), at(10.5)) == [1, 2]
+    assert intervals.find(at(11), at(13)) == []
+    assert intervals.find(at(8), at(18)) == [1, 2, 3]
+    assert not intervals.add(4, at(13.5), at(15))
+
+    assert intervals.remove(2)
+    assert intervals.find(at(10), at(11)) == []
+
+def test_index_falls_back_when_cold_or_stale():
+    """A cold index or stale room returns None so callers use the database."""
+    index = BookingIndex(enabled=True)
+    assert index.lookup(1, at(9), at(10)) is None
+
+    index.ready, index.since, index.active_rooms = True, DAY - timedelta(days=1), {1}
+    booking = SimpleNamespace(id=1, room_id=1, start_time=at(9), end_time=at(10), status="confirmed")
+    index.booking_saved(booking)
+    assert index.lookup(1, at(9), at(12)) == [1]
+    assert index.lookup(1, DAY - timedelta(days=3), at(12)) is None  # older than the indexed history
+
+    index.mark_stale(1)
+    assert index.lookup(1, at(9), at(12)) is None
+
+    booking.status = "cancelled"
+    index.booking_saved(booking)
+    assert 1 not in index.rooms[1].ids
+
+def test_rooms_saved_during_build_are_kept():
+    """A room created while the index reads its snapshot is not lost when the snapshot lands."""
+    index = BookingIndex(enabled=True)
+
+    async def load_rooms(db):
+        index.room_saved(SimpleNamespace(id=7, is_active=True))
+        return {1}
+
+    async def load_intervals(db):
+        return {}
+
+    @asynccontextmanager
+    async def session_factory():
+        yield None
+
+    index._load_rooms, index._load_intervals = load_rooms, load_intervals
+    asyncio.run(index.build(session_factory))
+    assert index.active_rooms == {1, 7}
+    assert index.room_exists(7) is True
+    assert index.room_exists(99) is None
+
+@pytest.fixture
+def warm_index(client, db_session, monkeypatch):
+    """Enable the shared index and build it from the test transaction."""
+    for name in ("enabled", "ready", "since", "rooms", "active_rooms", "stale_rooms"):
+        monkeypatch.setattr(booking_index, name, getattr(booking_index, name))
+    booking_index.enabled = True
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    client.portal.call(booking_index.build, session_factory)
+    return booking_index
+
+def test_availability_served_from_index(client, auth_headers, room, warm_index, db_session):
+    """Bookings made through the API are visible to index-backed availability checks."""
+    response = client.post("/api/v1/bookings", json={
+        "room_id": room["id"],
+        "start_time": at(10).isoformat(),
+        "end_time": at(11).isoformat()
+    }, headers=auth_headers)
+    booking_id = response.json()["id"]
+    assert warm_index.lookup(room["id"], at(10), at(11)) == [booking_id]
+
+    params = {"start_time": at(10.5).isoformat(), "end_time": at(12).isoformat()}
+    data = client.get(f"/api/v1/rooms/{room['id']}/availability", params=params).json()
+    assert data["available"] is False
+    assert [b["id"] for b in data["conflicting_bookings"]] == [booking_id]
+
+    client.delete(f"/api/v1/bookings/{booking_id}", headers=auth_headers)
+    data = client.get(f"/api/v1/rooms/{room['id']}/availability", params=params).json()
+    assert data["available"] is True
+
+    assert client.get("/api/v1/rooms/999/availability", params=params).status_code == 404
+
+def test_consistency_check_resyncs_external_writes(client, auth_headers, room, warm_index, db_session):
+    """Bookings written behind the index's back are found and indexed."""
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+
+    async def insert_directly():
+        booking = Booking(user_id=user_id, room_id=room["id"], start_time=at(14), end_time=at(15))
+        db_session.add(booking)
+        await db_session.flush()
+        return booking.id
+
+    booking_id = client.portal.call(insert_directly)
+    assert warm_index.lookup(room["id"], at(14), at(15)) == []
+
+    assert client.portal.call(warm_index.check_consistency, db_session) == [room["id"]]
+    assert warm_index.lookup(room["id"], at(14), at(15)) == [booking_id]
+
+def test_room_missing_from_index_is_checked_in_db(client, warm_index, db_session):
+    """A room the index has not seen, e.g. created on another worker, is looked up in the DB."""
+    async def insert_directly():
+        room = Room(name="Created elsewhere", capacity=4, is_active=True)
+        db_session.add(room)
+        await db_session.flush()
+        return room.id
+
+    room_id = client.portal.call(insert_directly)
+    assert warm_index.room_exists(room_id) is None
+    params = {"start_time": at(10).isoformat(), "end_time": at(11).isoformat()}
+    response = client.get(f"/api/v1/rooms/{room_id}/availability", params=params)
+    assert response.status_code == 200
+    assert response.json()["available"] is True
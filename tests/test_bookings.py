@@ -2,6 +2,8 @@
 import pytest
 from datetime import datetime, timedelta
 
+from app.config import MAX_BATCH_BOOKINGS
+
 class TestBookings:
     """Booking tests."""
     
@@ -63,4 +65,176 @@ class TestBookings:
     def test_get_my_bookings_requires_auth(self, client):
         """Test that getting bookings requires authentication."""
         response = client.get("/api/v1/bookings")
-        assert response.status_code in [401, 403]  # Either unauthorized or forbidden
\ No newline at end of file
+        assert response.status_code in [401, 403]  # Either unauthorized or forbidden
+    
+    def test_create_booking_and_conflict(self, client, auth_headers, room):
+        """Test creating a booking and rejecting an overlapping one."""
+        tomorrow = datetime.now() + timedelta(days=1)
+        start_time = tomorrow.replace(hour=10, minute=0, second=0, microsecond=0)
+        booking_data = {
+            "room_id": room["id"],
+            "start_time": start_time.isoformat(),
+            "end_time": (start_time + timedelta(hours=1)).isoformat()
+        }
+
+        response = client.post("/api/v1/bookings", json=booking_data, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["room_id"] == room["id"]
+        assert data["room"]["name"] == room["name"]
+
+        overlapping = dict(booking_data, start_time=(start_time + timedelta(minutes=30)).isoformat(),
+                           end_time=(start_time + timedelta(hours=2)).isoformat())
+        response = client.post("/api/v1/bookings", json=overlapping, headers=auth_headers)
+        assert response.status_code == 409
+
+        response = client.get("/api/v1/bookings", headers=auth_headers)
+        assert response.status_code == 200
+        assert [b["id"] for b in response.json()] == [data["id"]]
+
+    def test_overlap_boundaries(self, client, auth_headers, room):
+        """Back-to-back bookings are allowed; any intersection conflicts."""
+        day = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+        def book(start, end):
+            """Book [start, end) given as hours, 10.5 meaning 10:30."""
+            at = lambda hours: day.replace(hour=int(hours), minute=int(hours % 1 * 60)).isoformat()
+            return client.post("/api/v1/bookings", json={
+                "room_id": room["id"], "start_time": at(start), "end_time": at(end)
+            }, headers=auth_headers)
+
+        assert book(10, 11).status_code == 200
+        assert book(11, 12).status_code == 200      # starts exactly when the first ends
+        assert book(9, 10).status_code == 200       # ends exactly when the first starts
+        assert book(9.5, 11.5).status_code == 409   # covers both
+        assert book(10.5, 11.5).status_code == 409  # straddles the boundary
+
+        response = client.get(f"/api/v1/rooms/{room['id']}/availability", params={
+            "start_time": day.replace(hour=10, minute=30).isoformat(),
+            "end_time": day.replace(hour=12, minute=30).isoformat(),
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["available"] is False
+        assert len(data["conflicting_bookings"]) == 2
+
+    def test_batch_booking_modes(self, client, auth_headers, room, count_queries):
+        """Batches check the DB and each other; atomic is all-or-nothing."""
+        day = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        slot = lambda room_id, hour: {
+            "room_id": room_id,
+            "start_time": day.replace(hour=hour).isoformat(),
+            "end_time": day.replace(hour=hour + 1).isoformat()
+        }
+        existing = client.post("/api/v1/bookings", json=slot(room["id"], 9), headers=auth_headers).json()
+
+        items = [slot(room["id"], 10), slot(room["id"], 9), slot(room["id"], 10), slot(9999, 11)]
+        response = client.post("/api/v1/bookings/batch", json={"items": items}, headers=auth_headers)
+        assert response.status_code == 409
+        data = response.json()
+        assert [r["status"] for r in data["results"]] == ["not_created", "conflict", "conflict", "room_not_found"]
+        assert data["results"][1]["conflicting_booking_ids"] == [existing["id"]]
+        assert data["results"][2]["conflicting_items"] == [0]
+        assert len(client.get("/api/v1/bookings", headers=auth_headers).json()) == 1
+
+        with count_queries() as queries:
+            response = client.post("/api/v1/bookings/batch", json={"items": items, "mode": "best_effort"},
+                                   headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["created"], data["failed"]) == (1, 3)
+        assert data["results"][0]["booking"]["room"]["name"] == room["name"]
+        # user, rooms, one conflict query for the one live room, insert, reload + relations
+        assert len(queries) <= 8
+        assert len(client.get("/api/v1/bookings", headers=auth_headers).json()) == 2
+
+    def test_batch_booking_size_limits(self, client, auth_headers, room):
+        """Empty and oversized batches are rejected by validation."""
+        start = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+        item = {"room_id": room["id"], "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat()}
+        for items in ([], [item] * (MAX_BATCH_BOOKINGS + 1)):
+            response = client.post("/api/v1/bookings/batch", json={"items": items}, headers=auth_headers)
+            assert response.status_code == 422
+
+    def test_booking_series_lifecycle(self, client, auth_headers, room, count_queries):
+        """A weekly series expands, conflict-checks, moves and cancels as a whole."""
+        first = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        single = client.post("/api/v1/bookings", json={
+            "room_id": room["id"],
+            "start_time": (first + timedelta(weeks=2, hours=1)).isoformat(),
+            "end_time": (first + timedelta(weeks=2, hours=2)).isoformat()
+        }, headers=auth_headers).json()
+        series_data = {
+            "room_id": room["id"],
+            "start_time": first.isoformat(),
+            "end_time": (first + timedelta(minutes=30)).isoformat(),
+            "frequency": "weekly",
+            "count": 8
+        }
+
+        with count_queries() as queries:
+            response = client.post("/api/v1/bookings/series", json=series_data, headers=auth_headers)
+        assert response.status_code == 200
+        series = response.json()
+        assert [b["start_time"][:16] for b in series["bookings"]] == [
+            (first + timedelta(weeks=week)).isoformat()[:16] for week in range(8)
+        ]
+        # One range query checks all eight occurrences
+        conflict_checks = [q for q in queries if "bookings.room_id = " in q and "bookings.status = " in q]
+        assert len(conflict_checks) == 1
+
+        # Moving every occurrence to 10:00 would hit the single booking in week 3
+        moved = {"start_time": (first + timedelta(hours=1)).isoformat(),
+                 "end_time": (first + timedelta(hours=1, minutes=30)).isoformat()}
+        response = client.put(f"/api/v1/bookings/series/{series['id']}", json=moved, headers=auth_headers)
+        assert response.status_code == 409
+        assert str(single["id"]) in response.headers["X-Conflicting-Bookings"]
+
+        client.delete(f"/api/v1/bookings/{single['id']}", headers=auth_headers)
+        response = client.put(f"/api/v1/bookings/series/{series['id']}", json=moved, headers=auth_headers)
+        assert response.status_code == 200
+        assert {b["start_time"][11:16] for b in response.json()["bookings"]} == {"10:00"}
+
+        # One occurrence cancelled on its own, then the rest in one go
+        client.delete(f"/api/v1/bookings/{series['bookings'][0]['id']}", headers=auth_headers)
+        response = client.delete(f"/api/v1/bookings/series/{series['id']}", headers=auth_headers)
+        assert response.status_code == 200
+        series = client.get(f"/api/v1/bookings/series/{series['id']}", headers=auth_headers).json()
+        assert series["status"] == "cancelled"
+        assert {b["status"] for b in series["bookings"]} == {"cancelled"}
+
+    def test_booking_series_moves_with_aware_times(self, client, auth_headers, room):
+        """A series moves with UTC-suffixed times, and a new start alone keeps the duration."""
+        first = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        series = client.post("/api/v1/bookings/series", json={
+            "room_id": room["id"],
+            "start_time": first.isoformat(),
+            "end_time": (first + timedelta(minutes=30)).isoformat(),
+            "frequency": "weekly",
+            "count": 3
+        }, headers=auth_headers).json()
+
+        moved = {"start_time": (first + timedelta(hours=2)).isoformat() + "Z",
+                 "end_time": (first + timedelta(hours=3)).isoformat() + "Z"}
+        response = client.put(f"/api/v1/bookings/series/{series['id']}", json=moved, headers=auth_headers)
+        assert response.status_code == 200
+        assert {(b["start_time"][11:16], b["end_time"][11:16]) for b in response.json()["bookings"]} == {
+            ("11:00", "12:00")}
+
+        start_only = {"start_time": (first + timedelta(hours=4)).isoformat() + "Z"}
+        response = client.put(f"/api/v1/bookings/series/{series['id']}", json=start_only, headers=auth_headers)
+        assert response.status_code == 200
+        assert {(b["start_time"][11:16], b["end_time"][11:16]) for b in response.json()["bookings"]} == {
+            ("13:00", "14:00")}
+
+    def test_booking_series_requires_an_end(self, client, auth_headers, room):
+        """A series needs a count or an until date."""
+        start = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        response = client.post("/api/v1/bookings/series", json={
+            "room_id": room["id"],
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+            "frequency": "daily"
+        }, headers=auth_headers)
+        assert response.status_code == 422
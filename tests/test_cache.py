@@ -0,0 +1,26 @@
+"""Test the TTL + LRU cache."""
+from app.cache import TTLCache
+
+def test_lru_eviction_and_counters():
+    """The least recently used entry goes first; hits and misses are counted."""
+    cache = TTLCache("test_lru", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1      # "a" is now most recently used
+    cache.set("c", 3)               # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+def test_entries_expire_and_invalidate():
+    """Entries disappear after their TTL or when invalidated."""
+    cache = TTLCache("test_ttl", maxsize=10, ttl=60)
+    cache.set("short", "x", ttl=-1)
+    cache.set("long", "y")
+
+    assert cache.get("short") is None
+    assert cache.invalidate("long")
+    assert cache.get("long") is None
+    assert len(cache) == 0
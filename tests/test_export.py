@@ -0,0 +1,35 @@
+"""Test the streaming booking export."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from app.routers import admin
+
+def test_export_streams_filtered_rows(client, admin_headers, auth_headers, room, monkeypatch):
+    """NDJSON and CSV carry the same rows, in start order, honouring the filters."""
+    monkeypatch.setattr(admin, "EXPORT_CHUNK_ROWS", 2)  # several chunks from a handful of rows
+    day = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    for hour in (13, 9, 11, 15, 10):
+        client.post("/api/v1/bookings", json={
+            "room_id": room["id"], "start_time": day.replace(hour=hour).isoformat(),
+            "end_time": day.replace(hour=hour, minute=30).isoformat()
+        }, headers=auth_headers)
+
+    response = client.get("/api/v1/admin/bookings/export", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [datetime.fromisoformat(r["start_time"]).hour for r in rows] == [9, 10, 11, 13, 15]
+    assert rows[0]["room_id"] == room["id"] and rows[0]["status"] == "confirmed"
+
+    response = client.get("/api/v1/admin/bookings/export", params={"format": "csv", "room_id": room["id"]},
+                          headers=admin_headers)
+    assert response.headers["content-disposition"] == 'attachment; filename="bookings.csv"'
+    table = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(r["id"]) for r in table] == [r["id"] for r in rows]
+    assert table[0]["series_id"] == ""
+
+    response = client.get("/api/v1/admin/bookings/export", params={"room_id": room["id"] + 1},
+                          headers=admin_headers)
+    assert response.text == ""
+    assert client.get("/api/v1/admin/bookings/export", headers=auth_headers).status_code == 403
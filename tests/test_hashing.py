@@ -0,0 +1,59 @@
+"""Test the bounded password hashing pool."""
+import asyncio
+import threading
+import pytest
+from app.hashing import HashingPool, HashingPoolFull
+from app import auth
+
+def test_pool_runs_off_loop_and_counts():
+    """Hash calls run on pool threads and are counted."""
+    pool = HashingPool(workers=2, queue_limit=2)
+    caller = threading.get_ident()
+
+    async def run():
+        return await asyncio.gather(*(pool.run(threading.get_ident) for _ in range(4)))
+
+    idents = asyncio.run(run())
+    assert caller not in idents
+    assert pool.completed == 4
+    assert pool.pending == 0
+    pool.shutdown()
+
+def test_pool_rejects_when_queue_full():
+    """Calls beyond workers + queue limit are refused with a retry hint."""
+    pool = HashingPool(workers=1, queue_limit=1)
+    release = threading.Event()
+
+    async def run():
+        blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HashingPoolFull) as exc_info:
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+        return exc_info.value
+
+    error = asyncio.run(run())
+    assert error.retry_after >= 1
+    assert pool.rejected == 1
+    pool.shutdown()
+
+def test_login_returns_503_when_hashing_saturated(client, test_user_data, monkeypatch):
+    """Login reports 503 with Retry-After instead of queueing forever."""
+    client.post("/auth/register", json=test_user_data)
+    monkeypatch.setattr(auth, "hashing_pool", HashingPool(workers=1, queue_limit=0))
+    monkeypatch.setattr(auth.hashing_pool, "pending", 1)
+
+    response = client.post("/auth/login", json={
+        "email": test_user_data["email"],
+        "password": test_user_data["password"]
+    })
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+def test_metrics_report_hashing_pool(client):
+    """The metrics endpoint exposes pool size and queue limit."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "password_hash_pool_size" in response.text
+    assert "password_hash_queue_limit" in response.text
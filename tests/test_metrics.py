@@ -0,0 +1,55 @@
+"""Test the metrics registry and request instrumentation."""
+from app.instrumentation import http_request_db_queries, http_request_seconds, http_requests
+from app.metrics import Registry
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative and end with +Inf, followed by sum and count."""
+    registry = Registry()
+    histogram = registry.histogram("work_seconds", "Work", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, kind="a")
+
+    text = registry.render()
+    assert "# TYPE work_seconds histogram" in text
+    assert 'work_seconds_bucket{kind="a",le="0.1"} 2' in text
+    assert 'work_seconds_bucket{kind="a",le="1"} 3' in text
+    assert 'work_seconds_bucket{kind="a",le="+Inf"} 4' in text
+    assert 'work_seconds_sum{kind="a"} 3.65' in text
+    assert 'work_seconds_count{kind="a"} 4' in text
+
+def test_requests_are_labelled_by_route_template(client, room):
+    """Latency and status are recorded per route template, not per raw path."""
+    route = "/api/v1/rooms/{room_id}"
+    requests_before = http_requests.value(method="GET", route=route, status=200)
+    missing_before = http_requests.value(method="GET", route=route, status=404)
+    observed_before = http_request_seconds.count(method="GET", route=route)
+
+    client.get(f"/api/v1/rooms/{room['id']}")
+    client.get("/api/v1/rooms/999999")
+
+    assert http_requests.value(method="GET", route=route, status=200) == requests_before + 1
+    assert http_requests.value(method="GET", route=route, status=404) == missing_before + 1
+    assert http_request_seconds.count(method="GET", route=route) == observed_before + 2
+
+    text = client.get("/metrics").text
+    assert f'http_request_duration_seconds_bucket{{method="GET",route="{route}",le="+Inf"}}' in text
+
+def test_db_queries_are_counted_per_request(client, auth_headers):
+    """Each request records how many statements it ran."""
+    route = "/api/v1/bookings"
+    count_before = http_request_db_queries.count(route=route)
+    queries_before = http_request_db_queries.sum(route=route)
+
+    response = client.get("/api/v1/bookings", headers=auth_headers)
+    assert response.status_code == 200
+
+    assert http_request_db_queries.count(route=route) == count_before + 1
+    assert http_request_db_queries.sum(route=route) > queries_before
+
+def test_metrics_report_pool_and_hashing(client, auth_headers):
+    """Pool gauges and bcrypt timings are exposed."""
+    text = client.get("/metrics").text
+    assert "db_pool_checked_out " in text
+    assert "db_pool_overflow " in text
+    assert 'password_hash_duration_seconds_count{operation="verify_password"}' in text
+    assert 'password_hash_duration_seconds_count{operation="get_password_hash"}' in text
@@ -0,0 +1,28 @@
+"""Test the Alembic migrations against the models."""
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _alembic_config(url):
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+def test_upgrade_matches_models_and_downgrades(tmp_path):
+    """Migrations build the same schema as the models and can be rolled back."""
+    db_file = tmp_path / "migrations.db"
+    config = _alembic_config(f"sqlite:///{db_file}")
+
+    command.upgrade(config, "head")
+    command.check(config)  # raises if the models and migrations have drifted
+
+    inspector = inspect(create_engine(f"sqlite:///{db_file}"))
+    indexes = {index["name"]: index for index in inspector.get_indexes("bookings")}
+    assert indexes["ix_bookings_room_time_confirmed"]["column_names"] == ["room_id", "start_time", "end_time"]
+
+    command.downgrade(config, "base")
+    inspector = inspect(create_engine(f"sqlite:///{db_file}"))
+    assert set(inspector.get_table_names()) == {"alembic_version"}
@@ -0,0 +1,65 @@
+"""Test keyset pagination of list endpoints."""
+from datetime import datetime, timedelta
+from app.models import Booking, Room
+from app.pagination import NEXT_CURSOR_HEADER, MAX_PAGE_SIZE, encode_cursor, decode_cursor
+
+def walk(client, path, headers=None, **params):
+    """Follow X-Next-Cursor until the last page, returning all pages."""
+    pages, cursor = [], None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        response = client.get(path, headers=headers, params=query)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+def test_cursor_round_trip():
+    """Cursors survive encoding, including datetimes."""
+    values = [datetime(2030, 1, 2, 9, 30), 17]
+    assert decode_cursor(encode_cursor(values), 2) == values
+
+def test_rooms_pages_cover_everything_once(client, db_session):
+    """Walking the public room list by cursor visits each active room exactly once."""
+    async def add_rooms():
+        db_session.add_all([Room(name=f"Paged room {i}", capacity=4, is_active=i != 3) for i in range(7)])
+        await db_session.flush()
+    client.portal.call(add_rooms)
+
+    pages = walk(client, "/api/v1/rooms", limit=2)
+    names = [room["name"] for page in pages for room in page]
+    assert [len(page) for page in pages] == [2, 2, 2]
+    assert names == [f"Paged room {i}" for i in range(7) if i != 3]
+
+def test_my_bookings_break_ties_by_id(client, db_session, auth_headers):
+    """Bookings sharing a start time are neither skipped nor repeated across pages."""
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    start = (datetime.now() + timedelta(days=5)).replace(hour=9, minute=0, second=0, microsecond=0)
+
+    async def add_bookings():
+        rooms = [Room(name=f"Tie room {i}", capacity=4) for i in range(5)]
+        db_session.add_all(rooms)
+        await db_session.flush()
+        db_session.add_all([
+            Booking(user_id=user_id, room_id=room.id, start_time=start + timedelta(hours=i // 2),
+                    end_time=start + timedelta(hours=i // 2, minutes=30))
+            for i, room in enumerate(rooms)
+        ])
+        await db_session.flush()
+    client.portal.call(add_bookings)
+
+    pages = walk(client, "/api/v1/bookings", headers=auth_headers, limit=2, include_related=False)
+    ids = [b["id"] for page in pages for b in page]
+    assert len(ids) == len(set(ids)) == 5
+    keys = [(b["start_time"], b["id"]) for page in pages for b in page]
+    assert keys == sorted(keys)
+
+def test_page_size_is_capped_and_cursor_validated(client, admin_headers):
+    """Oversized pages are clamped and garbage cursors rejected."""
+    response = client.get("/api/v1/admin/users", headers=admin_headers, params={"limit": MAX_PAGE_SIZE * 10})
+    assert response.status_code == 200
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    response = client.get("/api/v1/admin/users", headers=admin_headers, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,66 @@
+"""Test that list endpoints load related rows in a constant number of queries."""
+from datetime import datetime, timedelta
+from itertools import count as counter
+import pytest
+from app.models import Booking, Room, User
+
+DAY = (datetime.now() + timedelta(days=3)).replace(hour=8, minute=0, second=0, microsecond=0)
+_serial = counter()
+
+def add_bookings(client, db_session, count, owner_id=None):
+    """Insert `count` bookings, each with its own user and room unless an owner is given."""
+    async def insert():
+        for _ in range(count):
+            n = next(_serial)
+            user_id = owner_id
+            if user_id is None:
+                user = User(email=f"bulk{n}@example.com", hashed_password="x")
+                db_session.add(user)
+                await db_session.flush()
+                user_id = user.id
+            room = Room(name=f"Bulk room {n}", capacity=4)
+            db_session.add(room)
+            await db_session.flush()
+            db_session.add(Booking(user_id=user_id, room_id=room.id,
+                                   start_time=DAY, end_time=DAY + timedelta(hours=1)))
+        await db_session.flush()
+        db_session.expunge_all()
+    client.portal.call(insert)
+
+def query_count(client, count_queries, path, headers, **params):
+    client.get(path, headers=headers, params=params)  # warm the auth cache
+    with count_queries() as statements:
+        response = client.get(path, headers=headers, params=params)
+    assert response.status_code == 200
+    return len(statements), response.json()
+
+@pytest.mark.parametrize("include_related", [True, False])
+def test_admin_bookings_query_count_is_constant(client, db_session, admin_headers, count_queries,
+                                                include_related):
+    """Admin booking list cost does not grow with the number of users and rooms."""
+    add_bookings(client, db_session, 2)
+    small, _ = query_count(client, count_queries, "/api/v1/admin/bookings", admin_headers,
+                           include_related=include_related)
+    add_bookings(client, db_session, 10)
+    large, data = query_count(client, count_queries, "/api/v1/admin/bookings", admin_headers,
+                              include_related=include_related)
+
+    assert len(data) == 12
+    assert large == small
+    assert all((b["user"] is not None) == include_related for b in data)
+    assert all((b["room"] is not None) == include_related for b in data)
+
+def test_my_bookings_query_count_is_constant(client, db_session, auth_headers, count_queries):
+    """My bookings cost does not grow with the number of bookings."""
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+    add_bookings(client, db_session, 2, owner_id=user_id)
+    small, _ = query_count(client, count_queries, "/api/v1/bookings", auth_headers)
+    add_bookings(client, db_session, 10, owner_id=user_id)
+    large, data = query_count(client, count_queries, "/api/v1/bookings", auth_headers)
+
+    assert len(data) == 12
+    assert large == small
+    assert data[0]["room"]["id"] and data[0]["user"]["id"] == user_id
+    lean, data = query_count(client, count_queries, "/api/v1/bookings", auth_headers, include_related=False)
+    assert lean == large == 1  # user and room come from the same joined SELECT
+    assert data[0]["room"] is None
@@ -0,0 +1,94 @@
+"""Test read-replica routing with two SQLite files standing in for primary and replica."""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.database import Base, get_db
+from app.http_cache import room_cache
+from app.main import app
+from app.models import Room
+from app.replicas import ReadRouter, ReadYourWritesMiddleware
+
+SEARCH = {"start": "2030-01-07T10:00:00", "end": "2030-01-07T11:00:00"}
+
+async def _create(engine, room_name):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        db.add(Room(name=room_name, capacity=4, is_active=True))
+        await db.commit()
+    await engine.dispose()
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    """The app reading from a replica file and writing to a primary file."""
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    asyncio.run(_create(primary, "Primary room"))
+    asyncio.run(_create(replica, "Replica room"))
+    primary_sessions = async_sessionmaker(primary, expire_on_commit=False)
+    router = ReadRouter(primary_sessions, [async_sessionmaker(replica, expire_on_commit=False)], window=60)
+    monkeypatch.setattr(database, "read_router", router)
+
+    async def primary_db():
+        async with primary_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = primary_db
+    room_cache.invalidate()
+    with TestClient(ReadYourWritesMiddleware(app, router)) as client:
+        yield client
+    app.dependency_overrides.clear()
+    asyncio.run(primary.dispose())
+    asyncio.run(replica.dispose())
+
+def _searched_names(client):
+    response = client.get("/api/v1/rooms/search", params=SEARCH)
+    assert response.status_code == 200
+    return [room["name"] for room in response.json()]
+
+def test_reads_go_to_replica_until_client_writes(replicated):
+    """Reads use the replica; after a write the cookie pins the client to the primary."""
+    assert _searched_names(replicated) == ["Replica room"]
+
+    response = replicated.post("/auth/register", json={
+        "email": "writer@example.com", "password": "writerpassword", "is_admin": False})
+    assert response.status_code == 200
+    assert "read_primary_until" in response.headers["set-cookie"]
+    assert _searched_names(replicated) == ["Primary room"]
+
+    replicated.cookies.clear()
+    assert _searched_names(replicated) == ["Replica room"]
+
+def test_router_sticks_to_primary_for_recent_writers():
+    """A successful write by a bearer token routes that token's reads to the primary."""
+    primary, replica = object(), object()
+    router = ReadRouter(primary, [replica], window=60)
+
+    assert router.session_factory("Bearer a") is replica
+    router.wrote("Bearer a")
+    assert router.session_factory("Bearer a") is primary
+    assert router.session_factory("Bearer b") is replica
+    assert router.session_factory(None, cookie="0") is replica
+    assert router.session_factory(None, cookie="not-a-time") is replica
+    assert router.session_factory(None, cookie=f"{time.time() + 30:.0f}") is primary
+
+def test_sticky_cookie_is_capped_to_the_window():
+    """Cookies claiming more than the read-after-write window, or not a finite time, are ignored."""
+    primary, replica = object(), object()
+    router = ReadRouter(primary, [replica], window=60)
+    assert router.session_factory(None, cookie=f"{time.time() + 60:.0f}") is primary
+    assert router.session_factory(None, cookie=f"{time.time() + 3600:.0f}") is replica
+    assert router.session_factory(None, cookie="inf") is replica
+    assert router.session_factory(None, cookie="nan") is replica
+
+def test_without_replicas_reads_use_primary():
+    """No replicas configured means every read uses the primary."""
+    primary = object()
+    router = ReadRouter(primary, [], window=5)
+    assert not router.enabled
+    assert router.session_factory("Bearer a") is primary
@@ -0,0 +1,96 @@
+"""Test room endpoints."""
+from datetime import datetime, timedelta
+
+def test_search_free_rooms(client, admin_headers, auth_headers, count_queries):
+    """Search returns active, large enough, equipped rooms with no overlapping booking."""
+    rooms = {}
+    for name, capacity, amenities in [("Huddle", 4, "tv"), ("Studio", 8, "Projector, Whiteboard"),
+                                      ("Hall", 40, "projector,whiteboard"), ("Annex", 10, "projectors")]:
+        rooms[name] = client.post("/api/v1/rooms", json={
+            "name": name, "capacity": capacity, "amenities": amenities
+        }, headers=admin_headers).json()["id"]
+
+    start = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+    client.post("/api/v1/bookings", json={
+        "room_id": rooms["Studio"],
+        "start_time": (start - timedelta(hours=1)).isoformat(),
+        "end_time": (start + timedelta(minutes=30)).isoformat()
+    }, headers=auth_headers)
+
+    def search(**params):
+        params = dict({"start": start.isoformat(), "end": (start + timedelta(hours=1)).isoformat()}, **params)
+        response = client.get("/api/v1/rooms/search", params=params)
+        assert response.status_code == 200
+        return [room["name"] for room in response.json()]
+
+    with count_queries() as queries:
+        assert search() == ["Huddle", "Annex", "Hall"]
+    assert len(queries) == 1
+    assert search(min_capacity=5, amenities="projector") == ["Hall"]
+    assert search(amenities="projector,whiteboard", start=(start + timedelta(minutes=30)).isoformat()) == [
+        "Studio", "Hall"
+    ]
+
+    response = client.get("/api/v1/rooms/search", params={"start": start.isoformat(), "end": start.isoformat()})
+    assert response.status_code == 400
+
+def test_bulk_upsert_rooms(client, admin_headers, auth_headers, room, count_queries):
+    """Rows are created or updated by name in one statement, with a result per row."""
+    rows = [
+        {"name": "Loft", "capacity": 6},
+        {"name": room["name"], "capacity": 20, "amenities": "projector"},
+        {"name": "Broken", "capacity": "many"},
+        {"name": "Loft", "capacity": 8, "is_active": False},
+    ]
+    with count_queries() as queries:
+        response = client.post("/api/v1/rooms/bulk", json=rows, headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["updated"], data["failed"]) == (1, 1, 1)
+    assert [r["status"] for r in data["results"]] == ["duplicate", "updated", "invalid", "created"]
+    assert data["results"][1]["room_id"] == room["id"]
+    assert "capacity" in data["results"][2]["detail"]
+    assert len([q for q in queries if q.lstrip().upper().startswith("INSERT")]) == 1
+
+    updated = client.get(f"/api/v1/rooms/{room['id']}").json()
+    assert (updated["capacity"], updated["amenities"]) == (20, "projector")
+    assert client.get(f"/api/v1/rooms/{data['results'][3]['room_id']}").status_code == 404  # imported inactive
+
+    csv_body = "name,capacity,amenities\nAtrium,50,\"tv,projector\"\nLoft,10,\n"
+    response = client.post("/api/v1/rooms/bulk", content=csv_body,
+                           headers=dict(admin_headers, **{"Content-Type": "text/csv"}))
+    assert [r["status"] for r in response.json()["results"]] == ["created", "updated"]
+    assert client.get("/api/v1/rooms/search", params={
+        "start": "2030-01-07T10:00:00", "end": "2030-01-07T11:00:00", "amenities": "tv"
+    }).json()[0]["name"] == "Atrium"
+
+    assert client.post("/api/v1/rooms/bulk", content="{}", headers=admin_headers).status_code == 400
+    assert client.post("/api/v1/rooms/bulk", json=rows, headers=auth_headers).status_code == 403
+
+def test_room_responses_cached_with_etags(client, admin_headers, room, count_queries):
+    """Cached room reads skip the database; a matching If-None-Match gets a bare 304."""
+    for path in ("/api/v1/rooms", f"/api/v1/rooms/{room['id']}"):
+        first = client.get(path)
+        etag = first.headers["ETag"]
+        assert first.headers["Last-Modified"].endswith("GMT")
+
+        with count_queries() as queries:
+            again = client.get(path)
+            not_modified = client.get(path, headers={"If-None-Match": f'W/"other", {etag}'})
+        assert queries == []
+        assert again.content == first.content and again.headers["ETag"] == etag
+        assert not_modified.status_code == 304 and not_modified.content == b""
+
+    response = client.get("/api/v1/rooms", params={"limit": 1})
+    assert response.headers.get_list("X-Next-Cursor") == [] and len(response.json()) == 1
+    # Keyed by the parameters the endpoint uses, not the raw query string
+    with count_queries() as queries:
+        client.get("/api/v1/rooms?skip=0&limit=01&utm_source=mail")
+    assert queries == []
+
+    client.put(f"/api/v1/rooms/{room['id']}", json={"capacity": 30}, headers=admin_headers)
+    with count_queries() as queries:
+        response = client.get(f"/api/v1/rooms/{room['id']}", headers={"If-None-Match": etag})
+    assert len(queries) == 1
+    assert response.status_code == 200 and response.json()["capacity"] == 30
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,25 @@
+"""Test the row-to-JSON path of the list endpoints."""
+from collections import namedtuple
+
+from app.serialization import BookingList, dump_list, row_dicts
+
+def test_row_dicts_nest_joined_columns():
+    """`relation__field` columns become nested dicts; other rows map directly."""
+    Row = namedtuple("Row", ["id", "user__id", "user__email"])
+    assert row_dicts([Row(1, 7, "a@example.com")]) == [{"id": 1, "user": {"id": 7, "email": "a@example.com"}}]
+    Flat = namedtuple("Flat", ["id", "name"])
+    assert row_dicts([Flat(1, "A"), Flat(2, "B")]) == [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+    assert row_dicts([]) == []
+
+def test_list_endpoint_matches_model_serialization(client, auth_headers, room):
+    """The fast path returns what validating the ORM objects would."""
+    payload = {"room_id": room["id"], "start_time": "2030-01-07T09:00:00", "end_time": "2030-01-07T10:00:00"}
+    created = client.post("/api/v1/bookings", json=payload, headers=auth_headers).json()
+
+    response = client.get("/api/v1/bookings", headers=auth_headers)
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [created]
+    assert response.content == BookingList.dump_json(BookingList.validate_python([created]))
+
+    Row = namedtuple("Row", list(created))
+    assert dump_list(BookingList, [Row(**created)]) == response.content
@@ -0,0 +1,100 @@
+"""Test the per room-day slot bitmaps."""
+from datetime import date, datetime, timedelta, timezone
+
+from app.slots import claim_mask, covering_masks, exact_mask
+
+DAY = date(2030, 1, 7)
+OVERLAP_QUERY = "bookings.end_time >"
+
+def at(hour, minute=0):
+    return datetime(2030, 1, 7, hour, minute)
+
+def test_masks():
+    """Slots count from opening time; only whole runs of grid slots are exact."""
+    assert exact_mask(at(8), at(9)) == (DAY, 0b11)
+    assert exact_mask(at(17, 30), at(18)) == (DAY, 1 << 19)
+    assert exact_mask(at(10, 30), at(11)) == (DAY, 1 << 5)
+    assert exact_mask(at(10, 30, ).replace(tzinfo=timezone(timedelta(hours=1))), at(11, 30).replace(
+        tzinfo=timezone(timedelta(hours=1)))) == (DAY, 0b11 << 3)  # 09:30-10:30 UTC
+
+    assert exact_mask(at(10, 15), at(11)) is None
+    assert covering_masks(at(10, 15), at(11)) == {DAY: 0b11 << 4}
+    assert exact_mask(at(7), at(9)) is None
+    assert covering_masks(at(7), at(9)) == {DAY: 0b11}
+    assert covering_masks(at(6), at(7)) == {}
+
+def test_day_grid_follows_bookings(client, auth_headers, room, count_queries):
+    """Creating, clashing with, moving and cancelling bookings keeps the grid in step."""
+    day = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+    def grid():
+        response = client.get(f"/api/v1/rooms/{room['id']}/availability/day", params={"date": day.date().isoformat()})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["slots"]) == 20 and data["slot_minutes"] == 30
+        return data["booked_mask"]
+
+    def book(start, end):
+        return client.post("/api/v1/bookings", json={
+            "room_id": room["id"],
+            "start_time": day.replace(hour=start).isoformat(),
+            "end_time": day.replace(hour=end).isoformat()
+        }, headers=auth_headers)
+
+    assert grid() == 0
+    first = book(9, 10).json()
+    assert grid() == 0b11 << 2
+
+    with count_queries() as queries:
+        assert book(9, 11).status_code == 409
+    # the bitmap claim failed, so the conflicting ids came from one range query
+    assert sum(OVERLAP_QUERY in q for q in queries) == 1
+    with count_queries() as queries:
+        assert book(10, 11).status_code == 200
+    assert not any(OVERLAP_QUERY in q for q in queries)
+    assert grid() == 0b1111 << 2
+
+    client.put(f"/api/v1/bookings/{first['id']}", json={
+        "start_time": day.replace(hour=12).isoformat(), "end_time": day.replace(hour=13).isoformat()
+    }, headers=auth_headers)
+    assert grid() == (0b11 << 4) | (0b11 << 8)
+
+    client.delete(f"/api/v1/bookings/{first['id']}", headers=auth_headers)
+    assert grid() == 0b11 << 4
+    assert client.get("/api/v1/rooms/9999/availability/day", params={"date": day.date().isoformat()}).status_code == 404
+
+def test_bulk_paths_update_slots(client, auth_headers, room):
+    """Batches and series set bits for every booking they create and clear them on cancel."""
+    day = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    mask_on = lambda when: client.get(f"/api/v1/rooms/{room['id']}/availability/day",
+                                      params={"date": when.date().isoformat()}).json()["booked_mask"]
+
+    client.post("/api/v1/bookings/batch", json={"items": [
+        {"room_id": room["id"], "start_time": day.replace(hour=h).isoformat(),
+         "end_time": day.replace(hour=h, minute=30).isoformat()} for h in (8, 9)
+    ]}, headers=auth_headers)
+    assert mask_on(day) == 0b101
+
+    series = client.post("/api/v1/bookings/series", json={
+        "room_id": room["id"], "start_time": day.replace(hour=17).isoformat(),
+        "end_time": day.replace(hour=18).isoformat(), "frequency": "daily", "count": 3
+    }, headers=auth_headers).json()
+    assert [mask_on(day + timedelta(days=n)) for n in range(3)] == [0b101 | 0b11 << 18, 0b11 << 18, 0b11 << 18]
+
+    client.delete(f"/api/v1/bookings/series/{series['id']}", headers=auth_headers)
+    assert [mask_on(day + timedelta(days=n)) for n in range(3)] == [0b101, 0, 0]
+
+def test_moves_claim_slots_conditionally(client, auth_headers, room, db_session):
+    """A slot taken after the range query, e.g. by a concurrent request, fails the move with a 409."""
+    day = (datetime.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    booking = client.post("/api/v1/bookings", json={
+        "room_id": room["id"], "start_time": day.replace(hour=9).isoformat(),
+        "end_time": day.replace(hour=10).isoformat()
+    }, headers=auth_headers).json()
+
+    # The bit is set without a booking row, as a racing writer would have between query and claim
+    assert client.portal.call(claim_mask, db_session, room["id"], day.date(), 1 << 8)
+    response = client.put(f"/api/v1/bookings/{booking['id']}", json={
+        "start_time": day.replace(hour=12).isoformat(), "end_time": day.replace(hour=13).isoformat()
+    }, headers=auth_headers)
+    assert response.status_code == 409
@@ -0,0 +1,50 @@
+"""Test that importing the app has no side effects."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_CHECK = """
+import sys
+import app.main
+from app.database import SessionLocal
+assert SessionLocal._engine is None, "engine created at import"
+loaded = {"numpy", "aiosqlite", "asyncpg", "fastapi_users"} & set(sys.modules)
+assert not loaded, loaded
+"""
+
+def test_import_creates_no_engine(tmp_path):
+    """Importing app.main loads no driver, no numpy and creates no database file."""
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'never.db'}")
+    result = subprocess.run([sys.executable, "-c", IMPORT_CHECK], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert not (tmp_path / "never.db").exists()
+
+def test_production_options(monkeypatch):
+    """run.py --production takes its worker and recycling settings from the environment."""
+    import run
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("MAX_REQUESTS", "0")
+    options = run.production_options()
+    assert options["workers"] == 3
+    assert options["limit_max_requests"] is None
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    assert run.production_options()["workers"] == run.available_cpus() >= 1
+
+def test_workers_draw_their_own_request_limit():
+    """Each worker unpickles the config with MAX_REQUESTS plus its own jitter."""
+    import pickle
+    import run
+    config = run.WorkerConfig("app.main:app", limit_max_requests=1000, max_requests_jitter=100)
+    limits = {pickle.loads(pickle.dumps(config)).limit_max_requests for _ in range(20)}
+    assert config.limit_max_requests == 1000
+    assert len(limits) > 1 and all(1000 <= limit <= 1100 for limit in limits)
+
+def test_pool_options_follow_the_pool_class():
+    """Pool sizing is only passed to dialects using a QueuePool; in-memory SQLite has a StaticPool."""
+    from app.database import DB_POOL_SIZE, pool_options
+    assert pool_options("sqlite+aiosqlite:///:memory:") == {}
+    assert pool_options("sqlite+aiosqlite:///./bookings.db")["pool_size"] == DB_POOL_SIZE
+    assert pool_options("postgresql+asyncpg://user@localhost/meeting_rooms")["pool_size"] == DB_POOL_SIZE
@@ -0,0 +1,48 @@
+"""Test the admin stats endpoint and its in-process counters."""
+from datetime import datetime, timedelta
+import pytest
+from app.models import Room
+from app.stats import stats_counters
+
+def test_stats_counted_in_one_query(client, admin_headers, room, count_queries):
+    """Without counters the stats come straight from one aggregate query."""
+    with count_queries() as queries:
+        response = client.get("/api/v1/admin/stats", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "database" and data["age_seconds"] == 0
+    assert (data["total_rooms"], data["active_rooms"], data["total_users"]) == (1, 1, 1)
+    assert len([q for q in queries if "count(" in q.lower()]) == 1
+
+@pytest.fixture
+def counters(client, db_session, monkeypatch):
+    """Enable the shared counters and count them from the test transaction."""
+    for name in ("enabled", "values", "counted_at", "_counted_monotonic"):
+        monkeypatch.setattr(stats_counters, name, getattr(stats_counters, name))
+    stats_counters.enabled = True
+    client.portal.call(stats_counters.reconcile, db_session)
+    return stats_counters
+
+def test_counters_follow_writes_and_reconcile(client, admin_headers, auth_headers, room, counters, db_session):
+    """Write paths adjust the counters; reconciliation fixes writes made behind their back."""
+    start = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+    booking = client.post("/api/v1/bookings", json={
+        "room_id": room["id"], "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()
+    }, headers=auth_headers).json()
+    client.delete(f"/api/v1/rooms/{room['id']}", headers=admin_headers)
+
+    data = client.get("/api/v1/admin/stats", headers=admin_headers).json()
+    assert data["source"] == "counters"
+    assert (data["total_users"], data["total_rooms"], data["active_rooms"]) == (2, 1, 0)
+    assert (data["total_bookings"], data["active_bookings"]) == (1, 1)
+
+    client.delete(f"/api/v1/bookings/{booking['id']}", headers=auth_headers)
+    assert client.get("/api/v1/admin/stats", headers=admin_headers).json()["active_bookings"] == 0
+
+    async def insert_directly():
+        db_session.add(Room(name="Side Room", capacity=2))
+        await db_session.flush()
+
+    client.portal.call(insert_directly)
+    assert client.portal.call(counters.reconcile, db_session) == {"total_rooms": 1, "active_rooms": 1}
+    assert client.get("/api/v1/admin/stats", headers=admin_headers).json()["total_rooms"] == 2